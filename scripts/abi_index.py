@@ -0,0 +1,174 @@
+import bisect
+import json
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from struct import Struct
+
+from eth_hash.auto import keccak
+
+# the files of abi/ by the source file and the name of their contract, multicall3.abi is not built from this repo
+ABI_FILES = {
+    "ENSRegistry.abi": ("ENSRegistry.sol", "ENSRegistry"),
+    "govtoken.abi": ("GovToken.sol", "GovToken"),
+    "l2pgovernor.abi": ("L2PGovernor.sol", "L2PGovernor"),
+    "l2ptimelock.abi": ("L2PTimelock.sol", "L2PTimelock"),
+    "l2pvalidatorset.abi": ("L2PValidatorSet.sol", "L2PValidatorSet"),
+    "slashindicator.abi": ("SlashIndicator.sol", "SlashIndicator"),
+    "stakecredit.abi": ("StakeCredit.sol", "StakeCredit"),
+    "stakehub.abi": ("StakeHub.sol", "StakeHub"),
+    "system.abi": ("System.sol", "System"),
+    "systemreward.abi": ("SystemReward.sol", "SystemReward"),
+    "systemv2.abi": ("SystemV2.sol", "SystemV2"),
+}
+
+INDEX_JSON = "selectors.json"
+INDEX_TABLE = "selectors.bin"
+
+# the kinds of entries of the index, in the order of the table
+KINDS = ("function", "error", "event")
+
+# the sorted table: a header, fixed size records sorted by key then the utf-8 strings they point to. The key is the
+# topic0 of an event, or the selector of a function or an error padded with zeros
+TABLE_MAGIC = b"L2PS"
+TABLE_HEADER = Struct(">4sI")
+TABLE_RECORD = Struct(">32sBIHIH")
+KEY_LENGTH = 32
+
+
+def read_abi(out_dir, source, name):
+    artifact_path = os.path.join(out_dir, source, f"{name}.json")
+    try:
+        with open(artifact_path, "r") as f:
+            return json.load(f)["abi"]
+    except FileNotFoundError:
+        raise Exception(f"Cannot find the artifact of {name} at {artifact_path}, run forge build first")
+
+
+def read_abis(out_dir):
+    """
+    The abi of every contract of abi/ by its file name, read from the forge artifacts in a pool of threads.
+    """
+    with ThreadPoolExecutor() as executor:
+        abis = executor.map(lambda item: read_abi(out_dir, *item), ABI_FILES.values())
+        return dict(zip(ABI_FILES, abis))
+
+
+def format_abi(abi):
+    # as `forge inspect <contract> abi` prints it
+    return json.dumps(abi, indent=2) + "\n"
+
+
+def canonical_type(param):
+    if param["type"].startswith("tuple"):
+        return "(" + ",".join(canonical_type(component) for component in param["components"]) + ")" + param["type"][5:]
+    return param["type"]
+
+
+def signature(item):
+    return f"{item['name']}({','.join(canonical_type(param) for param in item['inputs'])})"
+
+
+def abi_entries(contract, abi):
+    """
+    Yield (kind, key, contract, signature) for the functions, errors and events of an abi, anonymous events have no
+    topic0 and are left out.
+    """
+    for item in abi:
+        if item["type"] not in KINDS or item.get("anonymous"):
+            continue
+        text = signature(item)
+        digest = keccak(text.encode())
+        yield item["type"], digest if item["type"] == "event" else digest[:4], contract, text
+
+
+def build_index(abis):
+    """
+    The sorted and deduplicated entries of the abis, by file name of abi/.
+    """
+    entries = set()
+    for file_name, abi in abis.items():
+        entries.update(abi_entries(ABI_FILES[file_name][1], abi))
+    return sorted(
+        entries, key=lambda entry: (entry[1].ljust(KEY_LENGTH, b"\0"), KINDS.index(entry[0]), entry[2], entry[3])
+    )
+
+
+def index_json(entries):
+    """
+    The index as compact json: the contracts and signatures of every 0x hex selector or topic0, by kind.
+    """
+    index = {f"{kind}s": {} for kind in KINDS}
+    for kind, key, contract, text in entries:
+        index[f"{kind}s"].setdefault("0x" + key.hex(), []).append([contract, text])
+    return json.dumps(index, sort_keys=True, separators=(",", ":")) + "\n"
+
+
+def index_table(entries):
+    """
+    The index as a binary table of records sorted by key, to be memory-mapped and binary searched by `SelectorTable`.
+    """
+    strings = bytearray()
+    offsets = {}
+
+    def string(text):
+        if text not in offsets:
+            offsets[text] = len(strings)
+            strings.extend(text.encode())
+        return offsets[text], len(text.encode())
+
+    records = bytearray(TABLE_HEADER.pack(TABLE_MAGIC, len(entries)))
+    for kind, key, contract, text in entries:
+        records.extend(
+            TABLE_RECORD.pack(key.ljust(KEY_LENGTH, b"\0"), KINDS.index(kind), *string(contract), *string(text))
+        )
+    return bytes(records + strings)
+
+
+class SelectorTable:
+    """
+    A memory-mapped table written by `index_table`, looked up by selector or topic0 without loading it.
+    """
+
+    def __init__(self, file_path):
+        with open(file_path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = TABLE_HEADER.unpack_from(self.data)
+        if magic != TABLE_MAGIC:
+            raise Exception(f"{file_path} is not a selector table")
+        self.strings_offset = TABLE_HEADER.size + self.count * TABLE_RECORD.size
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        # the key of the i-th record, for bisect
+        offset = TABLE_HEADER.size + i * TABLE_RECORD.size
+        return self.data[offset:offset + KEY_LENGTH]
+
+    def text(self, offset, length):
+        start = self.strings_offset + offset
+        return self.data[start:start + length].decode()
+
+    def lookup(self, key):
+        """
+        The (kind, contract, signature) of a 4 bytes selector or a 32 bytes topic0, given as bytes or 0x hex.
+        """
+        if isinstance(key, str):
+            key = bytes.fromhex(key[2:] if key.startswith("0x") else key)
+        key = key.ljust(KEY_LENGTH, b"\0")
+
+        matches = []
+        for i in range(bisect.bisect_left(self, key), self.count):
+            record_key, kind, contract_offset, contract_length, text_offset, text_length = TABLE_RECORD.unpack_from(
+                self.data, TABLE_HEADER.size + i * TABLE_RECORD.size
+            )
+            if record_key != key:
+                break
+            matches.append(
+                (KINDS[kind], self.text(contract_offset, contract_length), self.text(text_offset, text_length))
+            )
+        return matches
+
+    def close(self):
+        self.data.close()
@@ -0,0 +1,86 @@
+import hashlib
+import json
+import os
+
+from scripts.genesis import write_file_atomic
+
+
+def hash_tree(h, root_dir):
+    for root, dirs, files in os.walk(root_dir):
+        dirs.sort()
+        for file in sorted(files):
+            hash_file(h, os.path.join(root, file), os.path.relpath(os.path.join(root, file), root_dir))
+
+
+def hash_file(h, file_path, name):
+    with open(file_path, "rb") as f:
+        content = f.read()
+    # length prefixed, so that moving bytes between names or contents always changes the digest
+    h.update(f"{name}\0{len(content)}\0".encode())
+    h.update(content)
+
+
+def cache_key(contracts_dir, settings_files, compiler):
+    """
+    The digest of everything the deployed bytecode depends on: the patched sources, the files holding the compiler
+    settings and remapped dependencies, and the compiler toolchain.
+    """
+    h = hashlib.sha256()
+    hash_tree(h, contracts_dir)
+    for file_path in settings_files:
+        if os.path.exists(file_path):
+            hash_file(h, file_path, os.path.basename(file_path))
+    h.update(compiler.encode())
+    return h.hexdigest()
+
+
+class BytecodeCache:
+    """
+    The builds of the genesis contracts by cache key, their deployed bytecode and code sizes, one json file per key,
+    evicted in least recently used order once the cache grows over `max_size` bytes.
+    """
+
+    def __init__(self, cache_dir, max_size):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def load(self, key):
+        try:
+            with open(self.path(key), "r") as f:
+                build = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        # the mtime tracks the last use for the eviction
+        os.utime(self.path(key))
+        return build
+
+    def store(self, key, build):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        write_file_atomic(self.path(key), json.dumps(build))
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for file in os.listdir(self.cache_dir):
+            if not file.endswith(".json"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, file))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, file))
+
+        size = sum(entry[1] for entry in entries)
+        for _, file_size, file in sorted(entries):
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, file))
+            except FileNotFoundError:
+                # evicted concurrently by another build
+                pass
+            size -= file_size
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+import re
+import subprocess
+
+from scripts.build_cache import hash_file
+from scripts.genesis import write_file_atomic
+
+# `import "a.sol";`, `import "a.sol" as a;`, `import {A} from "a.sol";` and `import * as a from "a.sol";`
+import_pattern = re.compile(r"""^\s*import\s+(?:[^;"']*?\s+from\s+)?["']([^"']+)["'][^;]*;""", re.MULTILINE)
+
+
+def resolve_import(file_path, path, lib_dirs):
+    # relative to the importing file, or else a dependency under one of the lib directories of foundry.toml
+    if path.startswith("."):
+        return os.path.normpath(os.path.join(os.path.dirname(file_path), path))
+    for lib_dir in lib_dirs:
+        lib_path = os.path.join(lib_dir, path)
+        if os.path.exists(lib_path):
+            return lib_path
+    return None
+
+
+def import_closure(file_path, lib_dirs):
+    """
+    The sorted paths of a source and of every file it imports, transitively. Imports that cannot be resolved are
+    returned as they are written.
+    """
+    closure = set()
+    pending = [os.path.normpath(file_path)]
+    while pending:
+        path = pending.pop()
+        if path in closure:
+            continue
+        closure.add(path)
+        with open(path, "r") as f:
+            content = f.read()
+        for imported in import_pattern.findall(content):
+            resolved = resolve_import(path, imported, lib_dirs)
+            if resolved is None:
+                closure.add(imported)
+            elif resolved not in closure:
+                pending.append(resolved)
+    return sorted(closure)
+
+
+def closure_digest(file_path, lib_dirs, root_dir, toolchain):
+    """
+    The digest of everything the flattened source depends on: the files of its import closure, by path relative to
+    `root_dir`, and the forge toolchain.
+    """
+    h = hashlib.sha256()
+    for path in import_closure(file_path, lib_dirs):
+        if os.path.exists(path):
+            hash_file(h, path, os.path.relpath(path, root_dir))
+        else:
+            h.update(f"{path}\0".encode())
+    h.update(toolchain.encode())
+    return h.hexdigest()
+
+
+def forge_flatten(root_dir, source_path, output_path):
+    # with paths relative to the project, as the flattened files name their sources by them
+    os.makedirs(os.path.join(root_dir, os.path.dirname(output_path)), exist_ok=True)
+    subprocess.run(
+        ["forge", "flatten", source_path, "-o", output_path], cwd=root_dir, check=True, capture_output=True, text=True
+    )
+
+
+class FlattenIndex:
+    """
+    The closure digest of every flattened file by its path, those still matching are not flattened again.
+    """
+
+    def __init__(self, index_file):
+        self.index_file = index_file
+        try:
+            with open(index_file, "r") as f:
+                self.digests = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.digests = {}
+
+    def fresh(self, output_path, digest):
+        return self.digests.get(output_path) == digest and os.path.exists(output_path)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+        write_file_atomic(self.index_file, json.dumps(self.digests, indent=2, sort_keys=True))
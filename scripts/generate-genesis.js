@@ -1,67 +0,0 @@
-const program = require('commander');
-const nunjucks = require('nunjucks');
-const fs = require('fs');
-const web3 = require('web3');
-
-const validators = require('./validators');
-const init_holders = require('./init_holders');
-
-program.version('0.0.1');
-program.option('-c, --chainId <chainId>', 'chain id', '714');
-program.option('-e, --ensRegistryOwner <ens-registry-owner-address>', 'ens registry owner address', '0x...');
-program.option('-o, --output <output-file>', 'Genesis json file', './genesis.json');
-program.option('-t, --template <template>', 'Genesis template json', './genesis-template.json');
-program.parse(process.argv);
-
-// get byte code from compiled contract
-function readByteCode(key, contractFile) {
-  return new Promise((resolve, reject) => {
-    fs.readFile(`${contractFile}`, 'utf8', (err, data) => {
-      if (err) {
-        reject(new Error('Error reading file: ' + err.message));
-        return;
-      }
-
-      try {
-        const jsonObj = JSON.parse(data);
-        const compiledData = jsonObj['deployedBytecode']['object'];
-
-        resolve({
-          key: key,
-          compiledData: compiledData,
-        });
-      } catch (parseError) {
-        reject(new Error('Error parsing JSON: ' + parseError.message));
-      }
-    });
-  });
-}
-
-// compile files
-Promise.all([
-  readByteCode('validatorContract', 'out/L2PValidatorSet.sol/L2PValidatorSet.json'),
-  readByteCode('systemRewardContract', 'out/SystemReward.sol/SystemReward.json'),
-  readByteCode('slashContract', 'out/SlashIndicator.sol/SlashIndicator.json'),
-  readByteCode('govHub', 'out/GovHub.sol/GovHub.json'),
-  readByteCode('stakeHub', 'out/StakeHub.sol/StakeHub.json'),
-  readByteCode('stakeCredit', 'out/StakeCredit.sol/StakeCredit.json'),
-  readByteCode('governor', 'out/L2PGovernor.sol/L2PGovernor.json'),
-  readByteCode('govToken', 'out/GovToken.sol/GovToken.json'),
-  readByteCode('timelock', 'out/L2PTimelock.sol/L2PTimelock.json'),
-  readByteCode('ensRegistry', 'out/ENSRegistry.sol/ENSRegistry.json')
-]).then((result) => {
-  const data = {
-    chainId: program.chainId,
-    initHolders: init_holders,
-    extraData: web3.utils.bytesToHex(validators.extraValidatorBytes),
-    ensRegistryOwner: program.ensRegistryOwner.slice(2).toLowerCase(),
-  };
-
-  result.forEach((r) => {
-    data[r.key] = r.compiledData;
-  });
-
-  const templateString = fs.readFileSync(program.template).toString();
-  const resultString = nunjucks.renderString(templateString, data);
-  fs.writeFileSync(program.output, resultString);
-});
@@ -1,74 +1,144 @@
-import fileinput
+import dataclasses
+import filecmp
+import functools
+import hashlib
+import json
 import os
 import re
 import shutil
 import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional
 
-import jinja2
 import typer
 from typing_extensions import Annotated
-from web3 import Web3
+
+# the other modules of scripts/ are imported by the commands using them, so that starting the cli for a command only
+# loads what it needs
+from scripts import genesis
+from scripts.timings import timings
 
 work_dir = os.getcwd()
 if work_dir.endswith("scripts"):
     work_dir = work_dir[:-8]
 
-network: str
-chain_id: int
-hex_chain_id: str
-ens_registry_owner: str
+# every network is patched and built in its own copy of contracts/ under this directory
+staging_dir = os.path.join(work_dir, ".staging")
+
+# the validators files once validated, in fixed size binary records
+compiled_validators_dir = os.path.join(work_dir, ".cache", "validators")
+
+
+@functools.lru_cache(maxsize=None)
+def bytecode_cache():
+    # the deployed bytecode of previous builds, keyed by the hash of their inputs
+    from scripts.build_cache import BytecodeCache
+
+    return BytecodeCache(os.path.join(work_dir, ".cache", "bytecode"), max_size=64 * 1024 * 1024)
 
 main = typer.Typer()
 
 
-def backup_file(source, destination):
-    try:
-        shutil.copyfile(source, destination)
-    except FileNotFoundError:
-        print(f"Source file '{source}' not found.")
-    except PermissionError:
-        print(f"Permission error: Unable to copy file '{source}' to '{destination}'.")
-    except Exception as e:
-        print(f"An error occurred: {e}")
+@main.callback()
+def cli(
+    ctx: typer.Context,
+    timings_file: Annotated[Optional[str], typer.Option(
+        "--timings", help="Write the wall time and the bytes read and written of every stage as json, - for stdout"
+    )] = None
+):
+    if timings_file is not None:
+        ctx.call_on_close(lambda: timings.dump(timings_file))
+
+
+@functools.lru_cache(maxsize=None)
+def compile_pattern(pattern):
+    return re.compile(pattern)
 
 
-def insert(contract, pattern, ins):
-    pattern = re.compile(pattern)
-    filepath = os.path.join(work_dir, "contracts", contract)
+def insert(content, pattern, ins):
+    lines = content.splitlines(keepends=True)
+    for i, line in enumerate(lines):
+        if pattern.search(line):
+            lines.insert(i, ins + "\n")
+            return "".join(lines)
 
-    found = False
-    with fileinput.FileInput(filepath, inplace=True) as file:
-        for line in file:
-            if not found and pattern.search(line):
-                print(ins)
-                found = True
-            print(line, end="")
+    raise Exception(f"{pattern} not found")
 
-    if not found:
+
+def replace(content, pattern, repl, count=1):
+    if not pattern.search(content):
         raise Exception(f"{pattern} not found")
 
+    return pattern.sub(repl, content, count=count)
 
-def replace(contract, pattern, repl, count=1):
-    pattern = re.compile(pattern)
-    filepath = os.path.join(work_dir, "contracts", contract)
 
-    with open(filepath, "r") as f:
-        content = f.read()
+class ContractPatch:
+    """
+    The edits of a contract, applied in memory by `stage_contracts` so that each contract is read and written once.
+    """
 
-    if pattern.search(content):
-        content = pattern.sub(repl, content, count=count)
-    else:
-        raise Exception(f"{pattern} not found")
+    def __init__(self, contract):
+        self.contract = contract
+        self.edits = []
 
-    with open(filepath, "w") as f:
-        f.write(content)
+    def insert(self, pattern, ins):
+        self.edits.append((insert, compile_pattern(pattern), (ins,)))
 
+    def replace(self, pattern, repl, count=1):
+        self.edits.append((replace, compile_pattern(pattern), (repl, count)))
 
-def replace_parameter(contract, parameter, value):
-    pattern = f"{parameter} =[^;]*;"
-    repl = f"{parameter} = {value};"
+    def replace_parameter(self, parameter, value):
+        self.replace(f"{parameter} =[^;]*;", f"{parameter} = {value};")
 
-    replace(contract, pattern, repl)
+    def apply(self, content):
+        for edit, pattern, args in self.edits:
+            content = edit(content, pattern, *args)
+        return content
+
+
+def stage_contracts(stage_dir, patches):
+    """
+    Mirror contracts/ into `stage_dir` with the patches applied. The source tree is never modified, and staged files
+    are only rewritten when their content changes so that forge's cache of the workspace stays valid.
+    """
+    contracts_dir = os.path.join(work_dir, "contracts")
+    staged_contracts_dir = os.path.join(stage_dir, "contracts")
+
+    plan = {}
+    for patch in patches:
+        plan.setdefault(patch.contract, []).append(patch)
+
+    staged = set()
+    for root, _, files in os.walk(contracts_dir):
+        for file in files:
+            # leftovers of the former in-place patching, see `recover`
+            if file.endswith(".bak"):
+                continue
+
+            source = os.path.join(root, file)
+            contract = os.path.relpath(source, contracts_dir)
+            target = os.path.join(staged_contracts_dir, contract)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            staged.add(contract)
+
+            if contract in plan:
+                with open(source, "r") as f:
+                    content = f.read()
+                for patch in plan.pop(contract):
+                    content = patch.apply(content)
+                genesis.write_file_atomic(target, content)
+            elif not os.path.exists(target) or not filecmp.cmp(source, target, shallow=False):
+                shutil.copy2(source, target)
+
+    if plan:
+        raise Exception(f"{', '.join(plan)} not found")
+
+    for root, _, files in os.walk(staged_contracts_dir):
+        for file in files:
+            target = os.path.join(root, file)
+            if os.path.relpath(target, staged_contracts_dir) not in staged:
+                os.remove(target)
 
 
 def convert_chain_id(int_chain_id: int):
@@ -81,315 +151,1067 @@ def convert_chain_id(int_chain_id: int):
         return None
 
 
-def generate_from_template(data, template_file, output_file):
-    template_loader = jinja2.FileSystemLoader(work_dir)
-    template_env = jinja2.Environment(loader=template_loader, autoescape=True)
+@functools.lru_cache(maxsize=None)
+def template_environment():
+    # jinja2 is only imported by the commands rendering templates, the compiled templates are cached by the environment
+    import jinja2
 
-    template = template_env.get_template(template_file)
-    result_string = template.render(data)
+    return jinja2.Environment(loader=jinja2.FileSystemLoader(work_dir), autoescape=True)
 
-    output_path = os.path.join(work_dir, output_file)
-    with open(output_path, "w") as output_file:
-        output_file.write(result_string)
 
+def generate_from_template(data, template_file, output_file):
+    with timings.span("template", template=template_file):
+        template = template_environment().get_template(template_file)
+        result_string = template.render(data)
 
-def generate_slash_indicator(misdemeanor_threshold, felony_threshold, init_felony_slash_scope):
-    contract = "SlashIndicator.sol"
-    backup_file(
-        os.path.join(work_dir, "contracts", contract), os.path.join(work_dir, "contracts", contract[:-4] + ".bak")
-    )
+        output_path = os.path.join(work_dir, output_file)
+        with open(output_path, "w") as output_file:
+            output_file.write(result_string)
 
-    replace_parameter(contract, "uint256 public constant MISDEMEANOR_THRESHOLD", f"{misdemeanor_threshold}")
-    replace_parameter(contract, "uint256 public constant FELONY_THRESHOLD", f"{felony_threshold}")
-    replace_parameter(contract, "uint256 public constant INIT_FELONY_SLASH_SCOPE", f"{init_felony_slash_scope}")
+
+def generate_slash_indicator(network, misdemeanor_threshold, felony_threshold, init_felony_slash_scope):
+    patch = ContractPatch("SlashIndicator.sol")
+
+    patch.replace_parameter("uint256 public constant MISDEMEANOR_THRESHOLD", f"{misdemeanor_threshold}")
+    patch.replace_parameter("uint256 public constant FELONY_THRESHOLD", f"{felony_threshold}")
+    patch.replace_parameter("uint256 public constant INIT_FELONY_SLASH_SCOPE", f"{init_felony_slash_scope}")
 
     if network == "dev":
-        insert(contract, "alreadyInit = true;", "\t\tenableMaliciousVoteSlash = true;")
+        patch.insert("alreadyInit = true;", "\t\tenableMaliciousVoteSlash = true;")
+
+    return patch
 
 
 def generate_stake_hub(
     breathe_block_interval, max_elected_validators, unbond_period, downtime_jail_time, felony_jail_time,
     stake_hub_protector
 ):
-    contract = "StakeHub.sol"
-    backup_file(
-        os.path.join(work_dir, "contracts", contract), os.path.join(work_dir, "contracts", contract[:-4] + ".bak")
-    )
+    patch = ContractPatch("StakeHub.sol")
+
+    patch.replace_parameter("uint256 public constant BREATHE_BLOCK_INTERVAL", f"{breathe_block_interval}")
 
-    replace_parameter(contract, "uint256 public constant BREATHE_BLOCK_INTERVAL", f"{breathe_block_interval}")
+    patch.replace(r"maxElectedValidators = .*;", f"maxElectedValidators = {max_elected_validators};")
+    patch.replace(r"unbondPeriod = .*;", f"unbondPeriod = {unbond_period};")
+    patch.replace(r"downtimeJailTime = .*;", f"downtimeJailTime = {downtime_jail_time};")
+    patch.replace(r"felonyJailTime = .*;", f"felonyJailTime = {felony_jail_time};")
+    patch.replace(r"__Protectable_init_unchained\(.*\);", f"__Protectable_init_unchained({stake_hub_protector});")
 
-    replace(contract, r"maxElectedValidators = .*;", f"maxElectedValidators = {max_elected_validators};")
-    replace(contract, r"unbondPeriod = .*;", f"unbondPeriod = {unbond_period};")
-    replace(contract, r"downtimeJailTime = .*;", f"downtimeJailTime = {downtime_jail_time};")
-    replace(contract, r"felonyJailTime = .*;", f"felonyJailTime = {felony_jail_time};")
-    replace(contract, r"__Protectable_init_unchained\(.*\);", f"__Protectable_init_unchained({stake_hub_protector});")
+    return patch
 
 
 def generate_governor(
     block_interval, init_voting_delay, init_voting_period, init_proposal_threshold, init_quorum_numerator,
     propose_start_threshold, init_min_period_after_quorum, governor_protector
 ):
-    contract = "L2PGovernor.sol"
-    backup_file(
-        os.path.join(work_dir, "contracts", contract), os.path.join(work_dir, "contracts", contract[:-4] + ".bak")
+    patch = ContractPatch("L2PGovernor.sol")
+
+    patch.replace_parameter("uint256 private constant BLOCK_INTERVAL", f"{block_interval}")
+    patch.replace_parameter("uint256 private constant INIT_VOTING_DELAY", f"{init_voting_delay}")
+    patch.replace_parameter("uint256 private constant INIT_VOTING_PERIOD", f"{init_voting_period}")
+    patch.replace_parameter("uint256 private constant INIT_PROPOSAL_THRESHOLD", f"{init_proposal_threshold}")
+    patch.replace_parameter("uint256 private constant INIT_QUORUM_NUMERATOR", f"{init_quorum_numerator}")
+    patch.replace_parameter(
+        "uint256 private constant PROPOSE_START_GOVL2P_SUPPLY_THRESHOLD", f"{propose_start_threshold}"
     )
+    patch.replace_parameter("uint64 private constant INIT_MIN_PERIOD_AFTER_QUORUM", f"{init_min_period_after_quorum}")
+    patch.replace(r"__Protectable_init_unchained\(.*\);", f"__Protectable_init_unchained({governor_protector});")
 
-    replace_parameter(contract, "uint256 private constant BLOCK_INTERVAL", f"{block_interval}")
-    replace_parameter(contract, "uint256 private constant INIT_VOTING_DELAY", f"{init_voting_delay}")
-    replace_parameter(contract, "uint256 private constant INIT_VOTING_PERIOD", f"{init_voting_period}")
-    replace_parameter(contract, "uint256 private constant INIT_PROPOSAL_THRESHOLD", f"{init_proposal_threshold}")
-    replace_parameter(contract, "uint256 private constant INIT_QUORUM_NUMERATOR", f"{init_quorum_numerator}")
-    replace_parameter(
-        contract, "uint256 private constant PROPOSE_START_GOVL2P_SUPPLY_THRESHOLD", f"{propose_start_threshold}"
-    )
-    replace_parameter(
-        contract, "uint64 private constant INIT_MIN_PERIOD_AFTER_QUORUM", f"{init_min_period_after_quorum}"
-    )
-    replace(contract, r"__Protectable_init_unchained\(.*\);", f"__Protectable_init_unchained({governor_protector});")
+    return patch
 
 
 def generate_timelock(init_minimal_delay):
-    contract = "L2PTimelock.sol"
-    backup_file(
-        os.path.join(work_dir, "contracts", contract), os.path.join(work_dir, "contracts", contract[:-4] + ".bak")
-    )
+    patch = ContractPatch("L2PTimelock.sol")
 
-    replace_parameter(contract, "uint256 private constant INIT_MINIMAL_DELAY", f"{init_minimal_delay}")
+    patch.replace_parameter("uint256 private constant INIT_MINIMAL_DELAY", f"{init_minimal_delay}")
 
+    return patch
 
-def generate_system():
-    contract = "System.sol"
-    backup_file(
-        os.path.join(work_dir, "contracts", contract), os.path.join(work_dir, "contracts", contract[:-4] + ".bak")
-    )
 
-    replace_parameter(contract, "uint16 public constant l2pChainID", f"0x{hex_chain_id}")
+def generate_system(hex_chain_id):
+    patch = ContractPatch("System.sol")
 
+    patch.replace_parameter("uint16 public constant l2pChainID", f"0x{hex_chain_id}")
+
+    return patch
+
+
+def generate_system_reward(network):
+    patch = ContractPatch("SystemReward.sol")
 
-def generate_system_reward():
     if network == "dev":
-        contract = "SystemReward.sol"
-        backup_file(
-            os.path.join(work_dir, "contracts", contract), os.path.join(work_dir, "contracts", contract[:-4] + ".bak")
-        )
+        patch.insert("numOperator = 2;", "\t\toperators[VALIDATOR_CONTRACT_ADDR] = true;")
+        patch.insert("numOperator = 2;", "\t\toperators[SLASH_CONTRACT_ADDR] = true;")
+        patch.replace("numOperator = 2;", "numOperator = 4;")
 
-        insert(contract, "numOperator = 2;", "\t\toperators[VALIDATOR_CONTRACT_ADDR] = true;")
-        insert(contract, "numOperator = 2;", "\t\toperators[SLASH_CONTRACT_ADDR] = true;")
-        replace(contract, "numOperator = 2;", "numOperator = 4;")
+    return patch
 
 
-def generate_validator_set(init_validator_set_bytes, init_burn_ratio):
-    contract = "L2PValidatorSet.sol"
-    backup_file(
-        os.path.join(work_dir, "contracts", contract), os.path.join(work_dir, "contracts", contract[:-4] + ".bak")
-    )
+def generate_validator_set(network, init_validator_set_bytes, init_burn_ratio):
+    patch = ContractPatch("L2PValidatorSet.sol")
 
-    replace_parameter(contract, "uint256 public constant INIT_BURN_RATIO", f"{init_burn_ratio}")
-    replace_parameter(contract, "bytes public constant INIT_VALIDATORSET_BYTES", f"hex\"{init_validator_set_bytes}\"")
+    patch.replace_parameter("uint256 public constant INIT_BURN_RATIO", f"{init_burn_ratio}")
+    patch.replace_parameter("bytes public constant INIT_VALIDATORSET_BYTES", f"hex\"{init_validator_set_bytes}\"")
 
     if network == "dev":
-        insert(
-            contract, r"for \(uint256 i; i < validatorSetPkg\.validatorSet\.length; \+\+i\)",
+        patch.insert(
+            r"for \(uint256 i; i < validatorSetPkg\.validatorSet\.length; \+\+i\)",
             "\t\tValidatorExtra memory validatorExtra;"
         )
-        insert(
-            contract, r"currentValidatorSet\.push\(validatorSetPkg.validatorSet\[i\]\);",
+        patch.insert(
+            r"currentValidatorSet\.push\(validatorSetPkg.validatorSet\[i\]\);",
             "\t\t\tvalidatorExtraSet.push(validatorExtra);"
         )
-        insert(
-            contract, r"currentValidatorSet\.push\(validatorSetPkg.validatorSet\[i\]\);",
+        patch.insert(
+            r"currentValidatorSet\.push\(validatorSetPkg.validatorSet\[i\]\);",
             "\t\t\tvalidatorExtraSet[i].voteAddress=validatorSetPkg.voteAddrs[i];"
         )
 
+    return patch
+
 
 def generate_gov_hub():
-    contract = "GovHub.sol"
-    backup_file(
-        os.path.join(work_dir, "contracts", contract), os.path.join(work_dir, "contracts", contract[:-4] + ".bak")
+    return ContractPatch("GovHub.sol")
+
+
+def compiled_validators_path(file_path):
+    # one compiled file per validators file, named after its path
+    name = hashlib.sha256(os.path.abspath(file_path).encode()).hexdigest()[:16]
+    return os.path.join(compiled_validators_dir, f"{name}.bin")
+
+
+def load_validators(config):
+    from scripts.validator_set import compile_validators, compiled_digest, read_compiled_validators, source_digest
+
+    # a validators file is validated and compiled again only when it changed since the last run
+    file_path = os.path.join(work_dir, config.validators_file)
+    compiled_file = compiled_validators_path(file_path)
+    if compiled_digest(compiled_file) != source_digest(file_path):
+        compile_validators(file_path, compiled_file)
+    return read_compiled_validators(compiled_file)
+
+
+def get_dev_validator_set_bytes(config):
+    from scripts.validator_set import encode_validator_set
+
+    return encode_validator_set(load_validators(config)).hex()
+
+
+@dataclasses.dataclass(frozen=True)
+class NetworkConfig:
+    network: str
+    # the network whose own patches of the contracts apply, that of the network a profile extends
+    patch_network: str
+    chain_id: int
+    genesis_file: str
+    # pretty as rendered by the template, or canonical: minified with sorted keys
+    genesis_format: str
+    # also write the genesis compressed with gzip or zstd, along with a sha256sum sidecar, when set
+    genesis_compression: str
+    ens_registry_owner: str
+    # the init_holders.js rendered by `generate-init-holders`, or a csv or jsonl file of holders and balances
+    init_holders_file: str
+
+    # init data, the validator set bytes of dev are encoded from the validators file when left empty
+    validators_file: str
+    # run the initializers of the system contracts on a local node and write the storage they set into the genesis
+    preinit: bool
+    init_burn_ratio: str
+    init_validator_set_bytes: str
+    source_chain_id: str
+
+    block_interval: str
+    breathe_block_interval: str
+    max_elected_validators: str
+    unbond_period: str
+    downtime_jail_time: str
+    felony_jail_time: str
+    init_felony_slash_scope: str
+    misdemeanor_threshold: str
+    felony_threshold: str
+    init_voting_delay: str
+    init_voting_period: str
+    init_proposal_threshold: str
+    init_quorum_numerator: str
+    propose_start_threshold: str
+    init_min_period_after_quorum: str
+    init_minimal_delay: str
+    lock_period_for_token_recover: str
+
+    stake_hub_protector: str
+    governor_protector: str
+    token_recover_portal_protector: str
+
+    @property
+    def hex_chain_id(self):
+        return convert_chain_id(self.chain_id)
+
+
+MAINNET = NetworkConfig(
+    network="mainnet",
+    patch_network="mainnet",
+    chain_id=12216,
+    genesis_file="./genesis.json",
+    genesis_format="pretty",
+    genesis_compression="",
+    ens_registry_owner="0x1B272dC2635CFBE67116434CdBfD7525f8F5196F",
+    init_holders_file="./scripts/init_holders.js",
+    validators_file="./validators.conf",
+    preinit=False,
+    init_burn_ratio="1000",
+    init_validator_set_bytes="f9016380f9015ff87394ae11fb1f89c83c3ad49636a283732a3692de76f994ae11fb1f89c83c3ad49636a283732a3692de76f994ae11fb1f89c83c3ad49636a283732a3692de76f98207d1b0b990452e4365ee99b1ae0bef9ade1639c45f9560a7e334abad2b802ae3b6ae53d8a613924e3d94716287438e44aef774f8739498803ed812d591b5dcc319652645036b6ca32d1b9498803ed812d591b5dcc319652645036b6ca32d1b9498803ed812d591b5dcc319652645036b6ca32d1b8207d1b084a27e33f9a4d177ece0792106c648c1b91937782b119e06aa274485798f60bac26b1363656ecf8ecdabade91b292326f87394da209d1508a1680be75751d0a9923d74997d90f294da209d1508a1680be75751d0a9923d74997d90f294da209d1508a1680be75751d0a9923d74997d90f28207d1b0ab314870c4485be98da76207e4bcbbff0e45506631966e27f9424105351f8a66c44177e1e9f58038878308eee1a3ce77",
+    source_chain_id="Binance-Chain-Tigris",
+    block_interval="3 seconds",
+    breathe_block_interval="1 days",
+    max_elected_validators="45",
+    unbond_period="7 days",
+    downtime_jail_time="2 days",
+    felony_jail_time="30 days",
+    init_felony_slash_scope="28800",
+    misdemeanor_threshold="50",
+    felony_threshold="150",
+    init_voting_delay="0 hours / BLOCK_INTERVAL",
+    init_voting_period="7 days / BLOCK_INTERVAL",
+    init_proposal_threshold="200 ether",
+    init_quorum_numerator="10",
+    propose_start_threshold="10_000_000 ether",
+    init_min_period_after_quorum="uint64(1 days / BLOCK_INTERVAL)",
+    init_minimal_delay="24 hours",
+    lock_period_for_token_recover="7 days",
+    stake_hub_protector="0xC27bD3c844842C0D376bF419087F9E98231D4693",
+    governor_protector="0xC27bD3c844842C0D376bF419087F9E98231D4693",
+    token_recover_portal_protector="0xC27bD3c844842C0D376bF419087F9E98231D4693",
+)
+
+TESTNET = dataclasses.replace(
+    MAINNET,
+    network="testnet",
+    patch_network="testnet",
+    chain_id=97,
+    genesis_file="./genesis-testnet.json",
+    init_validator_set_bytes="f901a880f901a4f844941284214b9b9c85549ab3d2b972df0deef66ac2c9946ddf42a51534fc98d0c0a3b42c963cace8441ddf946ddf42a51534fc98d0c0a3b42c963cace8441ddf8410000000f84494a2959d3f95eae5dc7d70144ce1b73b403b7eb6e0948081ef03f1d9e0bb4a5bf38f16285c879299f07f948081ef03f1d9e0bb4a5bf38f16285c879299f07f8410000000f8449435552c16704d214347f29fa77f77da6d75d7c75294dc4973e838e3949c77aced16ac2315dc2d7ab11194dc4973e838e3949c77aced16ac2315dc2d7ab1118410000000f84494980a75ecd1309ea12fa2ed87a8744fbfc9b863d594cc6ac05c95a99c1f7b5f88de0e3486c82293b27094cc6ac05c95a99c1f7b5f88de0e3486c82293b2708410000000f84494f474cf03cceff28abc65c9cbae594f725c80e12d94e61a183325a18a173319dd8e19c8d069459e217594e61a183325a18a173319dd8e19c8d069459e21758410000000f84494b71b214cb885500844365e95cd9942c7276e7fd894d22ca3ba2141d23adab65ce4940eb7665ea2b6a794d22ca3ba2141d23adab65ce4940eb7665ea2b6a78410000000",
+    source_chain_id="Binance-Chain-Ganges",
+    max_elected_validators="9",
+    felony_jail_time="5 days",
+    init_voting_period="1 days / BLOCK_INTERVAL",
+    init_proposal_threshold="100 ether",
+    init_min_period_after_quorum="uint64(1 hours / BLOCK_INTERVAL)",
+    init_minimal_delay="6 hours",
+    lock_period_for_token_recover="300 seconds",
+    stake_hub_protector="0x30151DA466EC8AB345BEF3d6983023E050fb0673",
+    governor_protector="0x30151DA466EC8AB345BEF3d6983023E050fb0673",
+    token_recover_portal_protector="0x30151DA466EC8AB345BEF3d6983023E050fb0673",
+)
+
+DEV = dataclasses.replace(
+    MAINNET,
+    network="dev",
+    patch_network="dev",
+    chain_id=714,
+    genesis_file="./genesis-dev.json",
+    init_validator_set_bytes="",
+    source_chain_id="Binance-Chain-Ganges",
+    stake_hub_protector="address(0xdEaD)",
+    governor_protector="address(0xdEaD)",
+)
+
+NETWORKS = {config.network: config for config in (MAINNET, TESTNET, DEV)}
+
+
+def generate_contracts(config):
+    return [
+        generate_system(config.hex_chain_id),
+        generate_system_reward(config.patch_network),
+        generate_gov_hub(),
+        generate_slash_indicator(
+            config.patch_network, config.misdemeanor_threshold, config.felony_threshold, config.init_felony_slash_scope
+        ),
+        generate_validator_set(config.patch_network, config.init_validator_set_bytes, config.init_burn_ratio),
+        generate_stake_hub(
+            config.breathe_block_interval, config.max_elected_validators, config.unbond_period,
+            config.downtime_jail_time, config.felony_jail_time, config.stake_hub_protector
+        ),
+        generate_governor(
+            config.block_interval, config.init_voting_delay, config.init_voting_period, config.init_proposal_threshold,
+            config.init_quorum_numerator, config.propose_start_threshold, config.init_min_period_after_quorum,
+            config.governor_protector
+        ),
+        generate_timelock(config.init_minimal_delay),
+    ]
+
+
+def forge_build(stage_dir):
+    # build the staged sources with the project's foundry.toml, remappings and libs, but keep the artifacts and the
+    # cache of each workspace apart; tests are left out as they import the unpatched sources
+    env = dict(
+        os.environ,
+        FOUNDRY_SRC=os.path.join(stage_dir, "contracts"),
+        FOUNDRY_TEST=os.path.join(stage_dir, "test"),
+        FOUNDRY_SCRIPT=os.path.join(stage_dir, "script"),
+        FOUNDRY_OUT=os.path.join(stage_dir, "out"),
+        FOUNDRY_CACHE_PATH=os.path.join(stage_dir, "cache"),
     )
+    with timings.span("forge_build", network=os.path.basename(stage_dir), subprocess=True):
+        subprocess.run(["forge", "build"], cwd=work_dir, env=env, check=True)
 
 
-def generate_genesis(output="./genesis.json"):
-    subprocess.run(["forge", "build"], cwd=work_dir, check=True)
-    subprocess.run(["node", "scripts/generate-genesis.js", "--chainId", f"{chain_id}", "--ensRegistryOwner", f"{ens_registry_owner}", "--output", f"{output}"], cwd=work_dir, check=True)
+@functools.lru_cache(maxsize=None)
+def compiler_version():
+    # solc is auto detected from the pragmas among the installed versions, so those are part of the toolchain too
+    forge_version = subprocess.run(["forge", "--version"], capture_output=True, text=True, check=True).stdout
+    svm_dirs = [os.path.expanduser("~/.svm"), os.path.join(os.path.expanduser("~/.local/share"), "svm")]
+    solc_versions = sorted(v for svm_dir in svm_dirs if os.path.isdir(svm_dir) for v in os.listdir(svm_dir))
+    return forge_version + ",".join(solc_versions)
 
 
-@main.command(help="Generate contracts for L2P mainnet")
-def mainnet():
-    global network, chain_id, hex_chain_id, ens_registry_owner
-    network = "mainnet"
-    chain_id = 12216
-    ens_registry_owner = "0x1B272dC2635CFBE67116434CdBfD7525f8F5196F"
-    hex_chain_id = convert_chain_id(chain_id)
-
-    # mainnet init data
-    init_burn_ratio = "1000"
-    init_validator_set_bytes = "f9016380f9015ff87394ae11fb1f89c83c3ad49636a283732a3692de76f994ae11fb1f89c83c3ad49636a283732a3692de76f994ae11fb1f89c83c3ad49636a283732a3692de76f98207d1b0b990452e4365ee99b1ae0bef9ade1639c45f9560a7e334abad2b802ae3b6ae53d8a613924e3d94716287438e44aef774f8739498803ed812d591b5dcc319652645036b6ca32d1b9498803ed812d591b5dcc319652645036b6ca32d1b9498803ed812d591b5dcc319652645036b6ca32d1b8207d1b084a27e33f9a4d177ece0792106c648c1b91937782b119e06aa274485798f60bac26b1363656ecf8ecdabade91b292326f87394da209d1508a1680be75751d0a9923d74997d90f294da209d1508a1680be75751d0a9923d74997d90f294da209d1508a1680be75751d0a9923d74997d90f28207d1b0ab314870c4485be98da76207e4bcbbff0e45506631966e27f9424105351f8a66c44177e1e9f58038878308eee1a3ce77"
-    source_chain_id = "Binance-Chain-Tigris"
-
-    block_interval = "3 seconds"
-    breathe_block_interval = "1 days"
-    max_elected_validators = "45"
-    unbond_period = "7 days"
-    downtime_jail_time = "2 days"
-    felony_jail_time = "30 days"
-    init_felony_slash_scope = "28800"
-    misdemeanor_threshold = "50"
-    felony_threshold = "150"
-    init_voting_delay = "0 hours / BLOCK_INTERVAL"
-    init_voting_period = "7 days / BLOCK_INTERVAL"
-    init_proposal_threshold = "200 ether"
-    init_quorum_numerator = "10"
-    propose_start_threshold = "10_000_000 ether"
-    init_min_period_after_quorum = "uint64(1 days / BLOCK_INTERVAL)"
-    init_minimal_delay = "24 hours"
-    lock_period_for_token_recover = "7 days"
-
-    stake_hub_protector = "0xC27bD3c844842C0D376bF419087F9E98231D4693"
-    governor_protector = "0xC27bD3c844842C0D376bF419087F9E98231D4693"
-    token_recover_portal_protector = "0xC27bD3c844842C0D376bF419087F9E98231D4693"
-
-    generate_system()
-    generate_system_reward()
-    generate_gov_hub()
-    generate_slash_indicator(misdemeanor_threshold, felony_threshold, init_felony_slash_scope)
-    generate_validator_set(init_validator_set_bytes, init_burn_ratio)
-    generate_stake_hub(
-        breathe_block_interval, max_elected_validators, unbond_period, downtime_jail_time, felony_jail_time,
-        stake_hub_protector
-    )
-    generate_governor(
-        block_interval, init_voting_delay, init_voting_period, init_proposal_threshold, init_quorum_numerator,
-        propose_start_threshold, init_min_period_after_quorum, governor_protector
+def build_cache_key(stage_dir):
+    from scripts.build_cache import cache_key
+
+    return cache_key(
+        os.path.join(stage_dir, "contracts"),
+        [os.path.join(work_dir, "foundry.toml"), os.path.join(work_dir, "package-lock.json")],
+        compiler_version(),
     )
-    generate_timelock(init_minimal_delay)
 
-    generate_genesis()
+
+def load_build(key):
+    # the bytecode and the code sizes of a cached build, the entries of older versions hold no sizes and are misses
+    build = bytecode_cache().load(key)
+    if build is None or "bytecodes" not in build:
+        return None
+    return build
+
+
+def build_contracts(config, stage_dir, use_cache=True):
+    """
+    Return the deployed bytecode of the genesis contracts staged in `stage_dir`, only running forge when no previous
+    build of the very same inputs is cached.
+    """
+    from scripts import sizes
+
+    with timings.span("cache_key", network=config.network):
+        key = build_cache_key(stage_dir)
+    if use_cache:
+        build = load_build(key)
+        if build is not None:
+            print(f"Bytecode cache hit for {config.network} ({key[:12]}), skip forge build")
+            return build["bytecodes"], True
+        print(f"Bytecode cache miss for {config.network} ({key[:12]})")
+
+    forge_build(stage_dir)
+    with timings.span("read_artifacts", network=config.network):
+        out_dir = os.path.join(stage_dir, "out")
+        bytecodes = genesis.read_bytecodes(out_dir)
+        # out/ is left from the last forge build on a cache hit, so the sizes are only known from the cache
+        bytecode_cache().store(key, {"bytecodes": bytecodes, "sizes": sizes.artifact_sizes(out_dir)})
+    return bytecodes, False
+
+
+def read_init_holders(config):
+    from scripts import holders
+
+    file_path = os.path.join(work_dir, config.init_holders_file)
+    if file_path.endswith(".js"):
+        return genesis.read_init_holders(file_path)
+    # streamed into the alloc, merged by address
+    return holders.init_holders(file_path, genesis.template_addresses(os.path.join(work_dir, "genesis-template.json")))
+
+
+genesis_formats = ("pretty", "canonical")
+
+# the options shared by the commands generating a genesis
+InitHoldersOption = Annotated[Optional[str], typer.Option(
+    "--init-holders",
+    help="A csv or jsonl file of init holders and their balances in wei, instead of scripts/init_holders.js"
+)]
+PreinitOption = Annotated[bool, typer.Option(
+    "--preinit", help="Write the storage set by the initializers of the system contracts, using anvil"
+)]
+FormatOption = Annotated[Optional[str], typer.Option(
+    "--format", help="pretty, as rendered by the template, or canonical: minified json with sorted keys"
+)]
+CompressOption = Annotated[Optional[str], typer.Option(
+    "--compress", help="Also write the genesis compressed with gzip or zstd, and the sha256 of both files"
+)]
+NoCacheOption = Annotated[bool, typer.Option("--no-cache", help="Always compile, ignoring the bytecode cache")]
+
+
+def with_options(config, init_holders=None, preinit=False, genesis_format=None, compress=None):
+    if init_holders is not None:
+        config = dataclasses.replace(config, init_holders_file=init_holders)
+    if preinit:
+        config = dataclasses.replace(config, preinit=True)
+    if genesis_format is not None:
+        if genesis_format not in genesis_formats:
+            raise typer.BadParameter(f"unknown format {genesis_format}, expected one of {', '.join(genesis_formats)}")
+        config = dataclasses.replace(config, genesis_format=genesis_format)
+    if compress is not None:
+        if compress not in genesis.COMPRESSIONS:
+            raise typer.BadParameter(
+                f"unknown compression {compress}, expected one of {', '.join(genesis.COMPRESSIONS)}"
+            )
+        if compress == "zstd":
+            # fail before building rather than once the genesis is written
+            genesis.zstandard_module()
+        config = dataclasses.replace(config, genesis_compression=compress)
+    return config
+
+
+def generate_genesis(config, bytecodes):
+    from scripts import holders
+    from scripts.validator_set import extra_data
+
+    with timings.span("validators", network=config.network):
+        extra = "0x" + extra_data(load_validators(config)).hex()
+
+    template_file = os.path.join(work_dir, "genesis-template.json")
+    storage = None
+    if config.preinit:
+        if config.chain_id in (MAINNET.chain_id, TESTNET.chain_id):
+            # the node would run its init system transactions in block 1 on top of the pre-initialized storage
+            raise Exception(
+                f"Cannot pre-initialize {config.network}: the nodes of mainnet and testnet do not skip the init of "
+                "block 1 on a pre-initialized genesis"
+            )
+        # web3 is only needed to talk to the local nodes
+        from scripts.preinit import initialized_storage
+
+        # the storage does not depend on the init holders, so they are left out of the genesis of the local nodes
+        def render(output_file, storage):
+            genesis.generate_genesis(
+                bytecodes, template_file, output_file, config.chain_id, config.ens_registry_owner, extra, [], storage
+            )
+
+        with timings.span("preinit", network=config.network, subprocess=True):
+            storage = initialized_storage(render)
+
+    stats = holders.HolderStats()
+    genesis_file = os.path.join(work_dir, config.genesis_file)
+    with timings.span("genesis", network=config.network, format=config.genesis_format):
+        genesis.generate_genesis(
+            bytecodes,
+            template_file,
+            genesis_file,
+            config.chain_id,
+            config.ens_registry_owner,
+            extra,
+            stats.count(read_init_holders(config)),
+            storage,
+            canonical=config.genesis_format == "canonical",
+        )
+    print(f"Init holders of {config.network}: {stats.accounts} account(s), total supply {stats.total_supply} wei")
+
+    if config.genesis_compression:
+        with timings.span("compress", network=config.network, compression=config.genesis_compression):
+            compressed_file = genesis.compress_genesis(genesis_file, config.genesis_compression)
+        print(
+            f"Compressed genesis of {config.network}: {os.path.getsize(compressed_file)} of "
+            f"{os.path.getsize(genesis_file)} bytes, sha256 in {config.genesis_file}.sha256"
+        )
+
+
+def resolve_config(config):
+    if not config.init_validator_set_bytes:
+        with timings.span("validator_set_bytes", network=config.network):
+            config = dataclasses.replace(config, init_validator_set_bytes=get_dev_validator_set_bytes(config))
+    return config
+
+
+def build_network(config, use_cache=True):
+    stage_dir = os.path.join(staging_dir, config.network)
+    with timings.span("patch", network=config.network):
+        stage_contracts(stage_dir, generate_contracts(config))
+    return build_contracts(config, stage_dir, use_cache)
+
+
+def generate_network(config, use_cache=True):
+    config = resolve_config(config)
+    bytecodes, cache_hit = build_network(config, use_cache)
+    generate_genesis(config, bytecodes)
+
+    return config, cache_hit
+
+
+def generate_network_worker(config, use_cache=True):
+    # the spans recorded in a worker process are handed back to the parent along with the result
+    config, cache_hit = generate_network(config, use_cache)
+    return config, cache_hit, timings.pop()
+
+
+def in_worker(fn, *args):
+    # the same for any stage
+    return fn(*args), timings.pop()
+
+
+def collect(results):
+    values = []
+    for value, spans in results:
+        timings.extend(spans)
+        values.append(value)
+    return values
+
+
+def stage_network(config):
+    config = resolve_config(config)
+    stage_dir = os.path.join(staging_dir, config.network)
+    with timings.span("patch", network=config.network):
+        stage_contracts(stage_dir, generate_contracts(config))
+    with timings.span("cache_key", network=config.network):
+        return config, build_cache_key(stage_dir)
+
+
+# the fields of a profile naming files, which are relative to the profile
+PROFILE_FILE_FIELDS = ("genesis_file", "init_holders_file", "validators_file")
+
+
+def load_profile(file_path, extended=()):
+    """
+    Load a network profile, a toml file of `NetworkConfig` fields overriding those of the network, or the profile
+    relative to it, that it `extends` (mainnet by default). The network is named after the file unless set, and its
+    genesis is written into its staging workspace unless `genesis_file` is set. The files it sets are relative to it.
+    """
+    import tomllib
+
+    with open(file_path, "rb") as f:
+        profile = tomllib.load(f)
+
+    base = profile.pop("extends", "mainnet")
+    if base in NETWORKS:
+        config = NETWORKS[base]
+    else:
+        base_path = os.path.join(os.path.dirname(file_path), base)
+        if os.path.abspath(base_path) in extended:
+            raise Exception(f"Profile {file_path} extends itself")
+        config = load_profile(base_path, extended + (os.path.abspath(file_path),))
+
+    fields = {field.name: field.type for field in dataclasses.fields(NetworkConfig)}
+    unknown = sorted(set(profile) - set(fields))
+    if unknown:
+        raise Exception(f"Unknown field(s) {', '.join(unknown)} in profile {file_path}")
+
+    values = {name: value if fields[name] in (int, bool) else str(value) for name, value in profile.items()}
+    if not isinstance(values.get("chain_id", 0), int):
+        raise Exception(f"chain_id of profile {file_path} is not an integer")
+    for name in PROFILE_FILE_FIELDS:
+        if name in values:
+            values[name] = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(file_path)), values[name]))
+    values.setdefault("network", os.path.splitext(os.path.basename(file_path))[0])
+    values.setdefault("genesis_file", os.path.join(staging_dir, values["network"], "genesis.json"))
+    # with their own validators, the validator set bytes are encoded from them
+    if "validators_file" in values:
+        values.setdefault("init_validator_set_bytes", "")
+
+    return dataclasses.replace(config, **values)
+
+
+@main.command(help="Generate contracts for L2P mainnet")
+def mainnet(
+    init_holders: InitHoldersOption = None,
+    preinit: PreinitOption = False,
+    genesis_format: FormatOption = None,
+    compress: CompressOption = None,
+    no_cache: NoCacheOption = False
+):
+    generate_network(with_options(MAINNET, init_holders, preinit, genesis_format, compress), use_cache=not no_cache)
     print("Generate genesis of mainnet successfully")
 
 
 @main.command(help="Generate contracts for L2P testnet")
-def testnet():
-    global network, chain_id, hex_chain_id
-    network = "testnet"
-    chain_id = 97
-    hex_chain_id = convert_chain_id(chain_id)
-
-    # testnet init data
-    init_burn_ratio = "1000"
-    init_validator_set_bytes = "f901a880f901a4f844941284214b9b9c85549ab3d2b972df0deef66ac2c9946ddf42a51534fc98d0c0a3b42c963cace8441ddf946ddf42a51534fc98d0c0a3b42c963cace8441ddf8410000000f84494a2959d3f95eae5dc7d70144ce1b73b403b7eb6e0948081ef03f1d9e0bb4a5bf38f16285c879299f07f948081ef03f1d9e0bb4a5bf38f16285c879299f07f8410000000f8449435552c16704d214347f29fa77f77da6d75d7c75294dc4973e838e3949c77aced16ac2315dc2d7ab11194dc4973e838e3949c77aced16ac2315dc2d7ab1118410000000f84494980a75ecd1309ea12fa2ed87a8744fbfc9b863d594cc6ac05c95a99c1f7b5f88de0e3486c82293b27094cc6ac05c95a99c1f7b5f88de0e3486c82293b2708410000000f84494f474cf03cceff28abc65c9cbae594f725c80e12d94e61a183325a18a173319dd8e19c8d069459e217594e61a183325a18a173319dd8e19c8d069459e21758410000000f84494b71b214cb885500844365e95cd9942c7276e7fd894d22ca3ba2141d23adab65ce4940eb7665ea2b6a794d22ca3ba2141d23adab65ce4940eb7665ea2b6a78410000000"
-    source_chain_id = "Binance-Chain-Ganges"
-
-    block_interval = "3 seconds"
-    breathe_block_interval = "1 days"
-    max_elected_validators = "9"
-    unbond_period = "7 days"
-    downtime_jail_time = "2 days"
-    felony_jail_time = "5 days"
-    init_felony_slash_scope = "28800"
-    misdemeanor_threshold = "50"
-    felony_threshold = "150"
-    init_voting_delay = "0 hours / BLOCK_INTERVAL"
-    init_voting_period = "1 days / BLOCK_INTERVAL"
-    init_proposal_threshold = "100 ether"
-    init_quorum_numerator = "10"
-    propose_start_threshold = "10_000_000 ether"
-    init_min_period_after_quorum = "uint64(1 hours / BLOCK_INTERVAL)"
-    init_minimal_delay = "6 hours"
-    lock_period_for_token_recover = "300 seconds"
-
-    stake_hub_protector = "0x30151DA466EC8AB345BEF3d6983023E050fb0673"
-    governor_protector = "0x30151DA466EC8AB345BEF3d6983023E050fb0673"
-    token_recover_portal_protector = "0x30151DA466EC8AB345BEF3d6983023E050fb0673"
-
-    generate_system()
-    generate_system_reward()
-    generate_gov_hub()
-    generate_slash_indicator(misdemeanor_threshold, felony_threshold, init_felony_slash_scope)
-    generate_validator_set(init_validator_set_bytes, init_burn_ratio)
-    generate_stake_hub(
-        breathe_block_interval, max_elected_validators, unbond_period, downtime_jail_time, felony_jail_time,
-        stake_hub_protector
-    )
-    generate_governor(
-        block_interval, init_voting_delay, init_voting_period, init_proposal_threshold, init_quorum_numerator,
-        propose_start_threshold, init_min_period_after_quorum, governor_protector
-    )
-    generate_timelock(init_minimal_delay)
-
-    generate_genesis("./genesis-testnet.json")
+def testnet(
+    init_holders: InitHoldersOption = None,
+    preinit: PreinitOption = False,
+    genesis_format: FormatOption = None,
+    compress: CompressOption = None,
+    no_cache: NoCacheOption = False
+):
+    generate_network(with_options(TESTNET, init_holders, preinit, genesis_format, compress), use_cache=not no_cache)
     print("Generate genesis of testnet successfully")
 
 
 @main.command(help="Generate contracts for dev environment")
 def dev(
-    dev_chain_id: int = 714,
-    init_burn_ratio: Annotated[str, typer.Option(help="init burn ratio of L2pValidatorSet")] = "1000",
+    dev_chain_id: int = DEV.chain_id,
+    ens_registry_owner: Annotated[str, typer.Option(help="owner of the ENS registry")] = DEV.ens_registry_owner,
+    init_burn_ratio: Annotated[str, typer.Option(help="init burn ratio of L2pValidatorSet")] = DEV.init_burn_ratio,
     source_chain_id: Annotated[
-        str, typer.Option(help="source chain id of the token recover portal")] = "Binance-Chain-Ganges",
-    stake_hub_protector: Annotated[str, typer.Option(help="assetProtector of StakeHub")] = "address(0xdEaD)",
-    governor_protector: Annotated[str, typer.Option(help="governorProtector of L2PGovernor")] = "address(0xdEaD)",
-    block_interval: Annotated[str, typer.Option(help="block interval of Parlia")] = "3 seconds",
-    breathe_block_interval: Annotated[str, typer.Option(help="breath block interval of Parlia")] = "1 days",
-    max_elected_validators: Annotated[str, typer.Option(help="maxElectedValidators of StakeHub")] = "45",
-    unbond_period: Annotated[str, typer.Option(help="unbondPeriod of StakeHub")] = "7 days",
-    downtime_jail_time: Annotated[str, typer.Option(help="downtimeJailTime of StakeHub")] = "2 days",
-    felony_jail_time: Annotated[str, typer.Option(help="felonyJailTime of StakeHub")] = "30 days",
-    init_felony_slash_scope: str = "28800",
-    misdemeanor_threshold: str = "50",
-    felony_threshold: str = "150",
-    init_voting_delay: Annotated[str,
-                                 typer.Option(help="INIT_VOTING_DELAY of L2PGovernor")] = "0 hours / BLOCK_INTERVAL",
+        str, typer.Option(help="source chain id of the token recover portal")] = DEV.source_chain_id,
+    stake_hub_protector: Annotated[str, typer.Option(help="assetProtector of StakeHub")] = DEV.stake_hub_protector,
+    governor_protector: Annotated[str, typer.Option(help="governorProtector of L2PGovernor")] = DEV.governor_protector,
+    block_interval: Annotated[str, typer.Option(help="block interval of Parlia")] = DEV.block_interval,
+    breathe_block_interval: Annotated[
+        str, typer.Option(help="breath block interval of Parlia")] = DEV.breathe_block_interval,
+    max_elected_validators: Annotated[
+        str, typer.Option(help="maxElectedValidators of StakeHub")] = DEV.max_elected_validators,
+    unbond_period: Annotated[str, typer.Option(help="unbondPeriod of StakeHub")] = DEV.unbond_period,
+    downtime_jail_time: Annotated[str, typer.Option(help="downtimeJailTime of StakeHub")] = DEV.downtime_jail_time,
+    felony_jail_time: Annotated[str, typer.Option(help="felonyJailTime of StakeHub")] = DEV.felony_jail_time,
+    init_felony_slash_scope: str = DEV.init_felony_slash_scope,
+    misdemeanor_threshold: str = DEV.misdemeanor_threshold,
+    felony_threshold: str = DEV.felony_threshold,
+    init_voting_delay: Annotated[str, typer.Option(help="INIT_VOTING_DELAY of L2PGovernor")] = DEV.init_voting_delay,
     init_voting_period: Annotated[str,
-                                  typer.Option(help="INIT_VOTING_PERIOD of L2PGovernor")] = "7 days / BLOCK_INTERVAL",
-    init_proposal_threshold: Annotated[str, typer.Option(help="INIT_PROPOSAL_THRESHOLD of L2PGovernor")] = "200 ether",
-    init_quorum_numerator: Annotated[str, typer.Option(help="INIT_QUORUM_NUMERATOR of L2PGovernor")] = "10",
+                                  typer.Option(help="INIT_VOTING_PERIOD of L2PGovernor")] = DEV.init_voting_period,
+    init_proposal_threshold: Annotated[
+        str, typer.Option(help="INIT_PROPOSAL_THRESHOLD of L2PGovernor")] = DEV.init_proposal_threshold,
+    init_quorum_numerator: Annotated[
+        str, typer.Option(help="INIT_QUORUM_NUMERATOR of L2PGovernor")] = DEV.init_quorum_numerator,
     propose_start_threshold: Annotated[
-        str, typer.Option(help="PROPOSE_START_GOVL2P_SUPPLY_THRESHOLD of L2PGovernor")] = "10_000_000 ether",
+        str, typer.Option(help="PROPOSE_START_GOVL2P_SUPPLY_THRESHOLD of L2PGovernor")] = DEV.propose_start_threshold,
     init_min_period_after_quorum: Annotated[
-        str, typer.Option(help="INIT_MIN_PERIOD_AFTER_QUORUM of L2PGovernor")] = "uint64(1 days / BLOCK_INTERVAL)",
-    init_minimal_delay: Annotated[str, typer.Option(help="INIT_MINIMAL_DELAY of L2PTimelock")] = "24 hours"
+        str, typer.Option(help="INIT_MIN_PERIOD_AFTER_QUORUM of L2PGovernor")] = DEV.init_min_period_after_quorum,
+    init_minimal_delay: Annotated[str,
+                                  typer.Option(help="INIT_MINIMAL_DELAY of L2PTimelock")] = DEV.init_minimal_delay,
+    init_holders: InitHoldersOption = None,
+    preinit: PreinitOption = False,
+    genesis_format: FormatOption = None,
+    compress: CompressOption = None,
+    no_cache: NoCacheOption = False
 ):
-    global network, chain_id, hex_chain_id
-    network = "dev"
-    chain_id = dev_chain_id
-    hex_chain_id = convert_chain_id(chain_id)
+    config = dataclasses.replace(
+        DEV,
+        chain_id=dev_chain_id,
+        ens_registry_owner=ens_registry_owner,
+        init_burn_ratio=init_burn_ratio,
+        source_chain_id=source_chain_id,
+        stake_hub_protector=stake_hub_protector,
+        governor_protector=governor_protector,
+        block_interval=block_interval,
+        breathe_block_interval=breathe_block_interval,
+        max_elected_validators=max_elected_validators,
+        unbond_period=unbond_period,
+        downtime_jail_time=downtime_jail_time,
+        felony_jail_time=felony_jail_time,
+        init_felony_slash_scope=init_felony_slash_scope,
+        misdemeanor_threshold=misdemeanor_threshold,
+        felony_threshold=felony_threshold,
+        init_voting_delay=init_voting_delay,
+        init_voting_period=init_voting_period,
+        init_proposal_threshold=init_proposal_threshold,
+        init_quorum_numerator=init_quorum_numerator,
+        propose_start_threshold=propose_start_threshold,
+        init_min_period_after_quorum=init_min_period_after_quorum,
+        init_minimal_delay=init_minimal_delay,
+    )
 
-    try:
-        result = subprocess.run(
-            [
-                "node", "-e",
-                "const exportsObj = require(\'./scripts/validators.js\'); console.log(exportsObj.validatorSetBytes.toString(\'hex\'));"
-            ],
-            capture_output=True,
-            text=True,
-            check=True,
-            cwd=work_dir
+    generate_network(with_options(config, init_holders, preinit, genesis_format, compress), use_cache=not no_cache)
+    print("Generate genesis of dev environment successfully")
+
+
+def parse_networks(networks):
+    configs = []
+    for name in networks.split(","):
+        if name.strip() not in NETWORKS:
+            raise typer.BadParameter(f"unknown network {name}, expected one of {', '.join(NETWORKS)}")
+        configs.append(NETWORKS[name.strip()])
+    return configs
+
+
+@main.command(name="all", help="Generate the genesis of several networks concurrently")
+def generate_all(
+    networks: Annotated[str, typer.Option(help="A list of networks separated by comma")] = ",".join(NETWORKS),
+    init_holders: InitHoldersOption = None,
+    preinit: PreinitOption = False,
+    genesis_format: FormatOption = None,
+    compress: CompressOption = None,
+    no_cache: NoCacheOption = False
+):
+    configs = [
+        with_options(config, init_holders, preinit, genesis_format, compress) for config in parse_networks(networks)
+    ]
+
+    hits = 0
+    with ProcessPoolExecutor(max_workers=len(configs)) as executor:
+        for config, cache_hit, spans in executor.map(
+            functools.partial(generate_network_worker, use_cache=not no_cache), configs
+        ):
+            hits += cache_hit
+            timings.extend(spans)
+            print(f"Generate genesis of {config.network} successfully")
+
+    if not no_cache:
+        print(f"Bytecode cache: {hits} hit(s), {len(configs) - hits} miss(es)")
+
+
+@main.command(help="Generate the genesis of network profiles in parallel, compiling every distinct source tree once")
+def matrix(
+    profiles: Annotated[List[str], typer.Argument(help="Network profiles, e.g. profiles/*.toml")],
+    no_cache: NoCacheOption = False
+):
+    configs = [load_profile(profile) for profile in profiles]
+    networks = [config.network for config in configs]
+    duplicates = sorted({network for network in networks if networks.count(network) > 1})
+    if duplicates:
+        raise typer.BadParameter(f"several profiles for {', '.join(duplicates)}")
+
+    with ProcessPoolExecutor(max_workers=min(len(configs), os.cpu_count() or 1)) as executor:
+        staged = collect(executor.map(functools.partial(in_worker, stage_network), configs))
+
+        # profiles whose patched sources hash the same share one build
+        groups = {}
+        for config, key in staged:
+            groups.setdefault(key, []).append(config)
+        builders = [group[0] for group in groups.values()]
+        builds = collect(
+            executor.map(
+                functools.partial(in_worker, build_contracts), builders,
+                [os.path.join(staging_dir, config.network) for config in builders], [not no_cache] * len(builders)
+            )
         )
-        init_validator_set_bytes = result.stdout.strip()[2:]
-    except subprocess.CalledProcessError as e:
-        raise Exception(f"Error getting init_validatorset_bytes: {e}")
-
-    generate_system()
-    generate_system_reward()
-    generate_gov_hub()
-    generate_slash_indicator(misdemeanor_threshold, felony_threshold, init_felony_slash_scope)
-    generate_validator_set(init_validator_set_bytes, init_burn_ratio)
-    generate_stake_hub(
-        breathe_block_interval, max_elected_validators, unbond_period, downtime_jail_time, felony_jail_time,
-        stake_hub_protector
-    )
-    generate_governor(
-        block_interval, init_voting_delay, init_voting_period, init_proposal_threshold, init_quorum_numerator,
-        propose_start_threshold, init_min_period_after_quorum, governor_protector
+
+        bytecodes = {}
+        for group, (group_bytecodes, _) in zip(groups.values(), builds):
+            for config in group:
+                bytecodes[config.network] = group_bytecodes
+        resolved = [config for config, _ in staged]
+        collect(
+            executor.map(
+                functools.partial(in_worker, generate_genesis), resolved,
+                [bytecodes[config.network] for config in resolved]
+            )
+        )
+
+    for config in resolved:
+        print(f"Generate genesis of {config.network} successfully: {config.genesis_file}")
+    hits = sum(hit for _, hit in builds)
+    print(f"{len(configs)} profile(s), {len(builds)} distinct build(s), {hits} bytecode cache hit(s)")
+
+
+def describe_genesis_difference(kind, name, fields):
+    if kind == "field":
+        subject = name
+    else:
+        subject = f"{genesis.contract_name('0x' + name) or 'account'} 0x{name}"
+
+    if fields[0] in ("missing", "unexpected"):
+        return f"{subject} is {fields[0]}"
+    if kind == "field":
+        return f"{subject} differs"
+    return f"{subject} differs in {', '.join(fields)}"
+
+
+@main.command(help="Regenerate the genesis of networks and compare it account by account with the committed one")
+def verify_genesis(
+    networks: Annotated[str, typer.Option(help="A list of networks separated by comma")] = ",".join(NETWORKS),
+    fail_fast: Annotated[bool, typer.Option("--fail-fast", help="Stop at the first difference")] = False,
+    no_cache: NoCacheOption = False
+):
+    from scripts.genesis_diff import diff_genesis
+
+    configs = parse_networks(networks)
+    # regenerate next to the workspaces, the committed genesis files are the reference
+    generated_configs = [
+        dataclasses.replace(config, genesis_file=os.path.join(staging_dir, config.network, "genesis.json"))
+        for config in configs
+    ]
+    with ProcessPoolExecutor(max_workers=len(configs)) as executor:
+        for _, _, spans in executor.map(
+            functools.partial(generate_network_worker, use_cache=not no_cache), generated_configs
+        ):
+            timings.extend(spans)
+
+    failed = False
+    for config, generated_config in zip(configs, generated_configs):
+        expected_file = os.path.join(work_dir, config.genesis_file)
+        differences = 0
+        for kind, name, fields in diff_genesis(expected_file, generated_config.genesis_file, fail_fast):
+            differences += 1
+            print(f"{config.network}: {describe_genesis_difference(kind, name, fields)}")
+            if fail_fast:
+                raise typer.Exit(code=1)
+
+        if differences:
+            failed = True
+            print(f"{config.network}: {differences} difference(s) with {config.genesis_file}")
+        else:
+            print(f"{config.network}: genesis bytecode not changed")
+
+    if failed:
+        raise typer.Exit(code=1)
+
+
+# the directories of the networks in the hardfork directories of the node repo
+hardfork_network_dirs = {"mainnet": "mainnet", "testnet": "chapel"}
+
+# the digests of the bytecode files of the node repo, by path, size and mtime
+hardfork_digests_path = os.path.join(work_dir, ".cache", "hardfork_digests.json")
+
+
+@main.command(help="Compare the genesis of networks with the bytecode of every hardfork in the node repo")
+def verify_hardfork(
+    repo_dir: Annotated[str, typer.Option(help="A clone of the node repo")] = "/tmp/l2p",
+    commit: Annotated[Optional[str], typer.Option(help="Check out this commit, cloning the repo if missing")] = None,
+    hardforks: Annotated[Optional[str], typer.Option(
+        help="A list of hardforks separated by comma that have to match, all of them shown by default and only the "
+        "latest holding each contract has to match"
+    )] = None,
+    networks: Annotated[str, typer.Option(help="A list of networks separated by comma")] = "mainnet,testnet",
+    no_cache: Annotated[bool, typer.Option("--no-cache", help="Hash every file, ignoring the digest cache")] = False
+):
+    from scripts.hardfork import DigestCache, genesis_code_digests, hardfork_files, hardfork_order, latest_files
+
+    configs = parse_networks(networks)
+    for config in configs:
+        if config.network not in hardfork_network_dirs:
+            raise typer.BadParameter(f"{config.network} has no hardfork bytecode in the node repo")
+
+    if commit is not None:
+        if not os.path.isdir(repo_dir):
+            subprocess.run(["git", "clone", "https://github.com/L2Protocol/l2p.git", repo_dir], check=True)
+        subprocess.run(["git", "checkout", commit], cwd=repo_dir, check=True)
+
+    network_dirs = {hardfork_network_dirs[config.network]: config for config in configs}
+    files = list(hardfork_files(repo_dir, hardforks.split(",") if hardforks else [], network_dirs))
+    if not files:
+        print(f"Cannot find any bytecode file in {repo_dir}")
+        raise typer.Exit(code=1)
+
+    cache = DigestCache(hardfork_digests_path)
+    if no_cache:
+        cache.entries = {}
+    with timings.span("hash_hardfork_files"):
+        file_digests, hashed = cache.digests([file_path for _, _, _, file_path in files])
+    cache.save()
+
+    genesis_digests = {
+        network_dir: genesis_code_digests(os.path.join(work_dir, config.genesis_file))
+        for network_dir, config in network_dirs.items()
+    }
+
+    # the directory of a hardfork holds the bytecode as of that hardfork, so without a choice of hardforks the older
+    # ones are only shown and the genesis has to match the latest holding each contract
+    expected = None
+    if not hardforks:
+        expected = set(latest_files(files, hardfork_order(repo_dir)).values())
+
+    # one row per hardfork and contract, one column per network
+    rows = {}
+    checked = mismatches = 0
+    for hardfork, network_dir, name, file_path in files:
+        match = genesis_digests[network_dir].get(name) == file_digests[file_path]
+        if expected is None or file_path in expected:
+            checked += 1
+            mismatches += not match
+            cell = "match" if match else "MISMATCH"
+        else:
+            cell = "match" if match else "older"
+        rows.setdefault((hardfork, name), {})[network_dir] = cell
+
+    hardfork_width = max(len("hardfork"), *(len(hardfork) for hardfork, _ in rows))
+    name_width = max(len("contract"), *(len(name) for _, name in rows))
+    columns = [config.network for config in configs]
+    header = f"{'hardfork':<{hardfork_width}}  {'contract':<{name_width}}  " + "  ".join(f"{c:<8}" for c in columns)
+    print(header.rstrip())
+    for (hardfork, name), cells in rows.items():
+        row = f"{hardfork:<{hardfork_width}}  {name:<{name_width}}  " + "  ".join(
+            f"{cells.get(hardfork_network_dirs[c], '-'):<8}" for c in columns
+        )
+        print(row.rstrip())
+
+    print(
+        f"{checked - mismatches} match(es), {mismatches} mismatch(es) of {checked} file(s) checked"
+        f"{'' if expected is None else ', the latest hardfork of each contract'}, {hashed} of {len(files)} "
+        "file(s) hashed"
     )
-    generate_timelock(init_minimal_delay)
+    if mismatches:
+        raise typer.Exit(code=1)
+
+
+@main.command(name="genesis", help="Assemble the genesis from the contracts already built for a network")
+def assemble_genesis(
+    network: Annotated[str, typer.Option(help="A network built before by its own command or `all`")] = "mainnet",
+    ens_registry_owner: Annotated[Optional[str], typer.Option(help="Override the owner of the ENS registry")] = None,
+    init_holders: InitHoldersOption = None,
+    preinit: PreinitOption = False,
+    genesis_format: FormatOption = None,
+    compress: CompressOption = None
+):
+    if network not in NETWORKS:
+        raise typer.BadParameter(f"unknown network {network}, expected one of {', '.join(NETWORKS)}")
+
+    config = NETWORKS[network]
+    if ens_registry_owner is not None:
+        config = dataclasses.replace(config, ens_registry_owner=ens_registry_owner)
+    config = resolve_config(with_options(config, init_holders, preinit, genesis_format, compress))
+
+    # the contracts patched for the network as it is now, e.g. with the validator set of validators.conf on dev, have
+    # to be those of a build, or the genesis would contradict its own bytecode
+    stage_dir = os.path.join(staging_dir, config.network)
+    with timings.span("patch", network=config.network):
+        stage_contracts(stage_dir, generate_contracts(config))
+    build = load_build(build_cache_key(stage_dir))
+    if build is None:
+        print(
+            f"No build of the contracts of {network} as patched now in the bytecode cache, they were never built or "
+            f"changed since: generate the network with `python -m scripts.generate {network}` instead"
+        )
+        raise typer.Exit(code=1)
 
-    generate_genesis("./genesis-dev.json")
-    print("Generate genesis of dev environment successfully")
+    generate_genesis(config, build["bytecodes"])
+    print(f"Generate genesis of {config.network} successfully")
+
+
+@main.command(help="Report the code size of every account and the total size of genesis files, compressed or not")
+def genesis_size(
+    genesis_files: Annotated[List[str], typer.Argument(help="Genesis files, .gz and .zst included")],
+):
+    for genesis_file in genesis_files:
+        report = genesis.size_report(genesis_file)
+        print(f"{genesis_file}:")
+        for address, size in report["code_sizes"]:
+            print(f"  {genesis.contract_name(address) or 'account'} {address}: {size} bytes")
+        print(
+            f"  {report['accounts']} account(s), {len(report['code_sizes'])} with code of "
+            f"{sum(size for _, size in report['code_sizes'])} bytes"
+        )
+        print(
+            f"  document {report['document_size']} bytes, file {report['file_size']} bytes, "
+            f"parsed in {report['parse_time'] * 1000:.1f}ms"
+        )
 
 
-@main.command(help="Recover from the backup")
+@main.command(help="Report the code size of the system contracts and the gas of the tests against a baseline")
+def size_report(
+    networks: Annotated[str, typer.Option(help="Networks generated before, separated by comma")] = ",".join(NETWORKS),
+    gas_snapshot: Annotated[Optional[str],
+                            typer.Option(help="The output of `forge snapshot`, e.g. .gas-snapshot")] = None,
+    baseline: Annotated[str, typer.Option(help="The committed report to compare with")] = "./size-baseline.json",
+    threshold: Annotated[float, typer.Option(help="Fail when a size or a gas grows by more than this percent")] = 1.0,
+    update: Annotated[bool, typer.Option("--update", help="Write the report as the new baseline")] = False
+):
+    from scripts import sizes
+
+    report = {"sizes": {}}
+    for config in parse_networks(networks):
+        # the build of the sources staged by the last generation of the network
+        build = load_build(build_cache_key(os.path.join(staging_dir, config.network)))
+        if build is None:
+            raise Exception(f"No build of {config.network} in the bytecode cache, generate the network first")
+        report["sizes"][config.network] = build["sizes"]
+    if gas_snapshot is not None:
+        report["gas"] = sizes.read_gas_snapshot(os.path.join(work_dir, gas_snapshot))
+
+    width = max(len("contract"), *(len(contract.name) for contract in genesis.GENESIS_CONTRACTS))
+    print(f"{'contract':<{width}}  {'network':<8}  {'initcode':>8}  {'runtime':>8}")
+    for network, network_sizes in report["sizes"].items():
+        for contract, size in network_sizes.items():
+            over = "  over the 24KB limit" if size["runtime"] > sizes.CODE_SIZE_LIMIT else ""
+            print(f"{contract:<{width}}  {network:<8}  {size['initcode']:>8}  {size['runtime']:>8}{over}")
+
+    baseline_path = os.path.join(work_dir, baseline)
+    if update:
+        previous = {}
+        if os.path.exists(baseline_path):
+            with open(baseline_path, "r") as f:
+                previous = json.load(f)
+        genesis.write_file_atomic(baseline_path, json.dumps(sizes.merge(previous, report), indent=2) + "\n")
+        print(f"Write the baseline to {baseline} successfully")
+        return
+    if not os.path.exists(baseline_path):
+        print(f"No baseline at {baseline}, run with --update to write it")
+        raise typer.Exit(code=1)
+
+    with open(baseline_path, "r") as f:
+        deltas = sizes.compare(json.load(f), report)
+    exceeded = [delta for delta in deltas if sizes.exceeds(delta, threshold)]
+    if deltas:
+        name_width = max(len("name"), *(len(delta.name) for delta in deltas))
+        print(f"\n{'name':<{name_width}}  {'before':>9}  {'after':>9}  delta")
+        for delta in deltas:
+            if delta.before is None or delta.after is None:
+                change = "new" if delta.before is None else "removed"
+            else:
+                change = f"{delta.after - delta.before:+d}"
+                if delta.before:
+                    change += f" ({(delta.after - delta.before) / delta.before:+.2%})"
+            row = f"{delta.name:<{name_width}}  {delta.before if delta.before is not None else '-':>9}  "
+            row += f"{delta.after if delta.after is not None else '-':>9}  {change}"
+            print(row + ("  EXCEEDED" if delta in exceeded else ""))
+
+    print(f"{len(deltas)} change(s) from {baseline}, {len(exceeded)} over the threshold of {threshold}%")
+    if exceeded:
+        raise typer.Exit(code=1)
+
+
+def file_states(path):
+    # the mtime and size of a file, or of every file under a directory
+    states = {}
+    if os.path.isdir(path):
+        for root, _, files in os.walk(path):
+            for file in files:
+                file_path = os.path.join(root, file)
+                try:
+                    stat = os.stat(file_path)
+                except FileNotFoundError:
+                    continue
+                states[file_path] = (stat.st_mtime_ns, stat.st_size)
+    elif os.path.exists(path):
+        stat = os.stat(path)
+        states[path] = (stat.st_mtime_ns, stat.st_size)
+    return states
+
+
+@main.command(help="Regenerate the genesis of a network whenever the contracts, validators or templates change")
+def watch(
+    network: Annotated[str, typer.Option(help="The network to regenerate")] = "dev",
+    init_holders: InitHoldersOption = None,
+    interval: Annotated[float, typer.Option(help="Seconds between two checks for changes")] = 0.5
+):
+    if network not in NETWORKS:
+        raise typer.BadParameter(f"unknown network {network}, expected one of {', '.join(NETWORKS)}")
+    config = with_options(NETWORKS[network], init_holders)
+
+    # the stage to start again from when the files of a group change; the validators of dev are part of its contracts
+    watched = {
+        "contracts": [os.path.join(work_dir, "contracts")],
+        "validators": [os.path.join(work_dir, config.validators_file)],
+        "genesis": [os.path.join(work_dir, "genesis-template.json"), os.path.join(work_dir, config.init_holders_file)],
+    }
+    states = {}
+    # the groups changed since the last successful run, and the bytecode it built
+    changed = set()
+    bytecodes = None
+    # the groups of a failed run, retried along with the next change only
+    failed = set()
+    print(f"Watching {network}, press Ctrl+C to stop")
+    try:
+        while True:
+            for group, paths in watched.items():
+                group_states = {}
+                for path in paths:
+                    group_states.update(file_states(path))
+                if states.get(group) != group_states:
+                    states[group] = group_states
+                    changed.add(group)
+
+            if changed:
+                changed |= failed
+                start = time.perf_counter()
+                try:
+                    resolved = resolve_config(config)
+                    if bytecodes is None or "contracts" in changed or (
+                        "validators" in changed and not config.init_validator_set_bytes
+                    ):
+                        # staging only rewrites the patched files that changed, so forge recompiles just those
+                        bytecodes, _ = build_network(resolved)
+                    if "genesis" in changed:
+                        genesis.load_template.cache_clear()
+                    generate_genesis(resolved, bytecodes)
+                    print(
+                        f"Regenerate genesis of {network} in {time.perf_counter() - start:.2f}s "
+                        f"({', '.join(sorted(changed))} changed)"
+                    )
+                    failed = set()
+                except Exception as e:
+                    # keep watching, the next change may fix it
+                    print(f"Failed to regenerate genesis of {network}: {e}")
+                    failed = changed
+                changed = set()
+
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+
+@main.command(help="Recover contracts patched in place by older versions of this script from the backup")
 def recover():
     contracts_dir = os.path.join(work_dir, "contracts")
     for file in os.listdir(contracts_dir):
@@ -416,67 +1238,206 @@ def generate_init_holders(
     print("Generate init holders successfully")
 
 
-@main.command(help="Generate validators")
+@main.command(help="Validate the validators file and compile it for the genesis, reporting every invalid row")
 def generate_validators(
     file_path: str = "./validators.conf",
-    template_file: str = "./scripts/validators.template",
-    output_file: str = "./scripts/validators.js"
+    output_file: Annotated[Optional[str], typer.Option(help="Defaults to the file read by the genesis")] = None
 ):
+    from scripts.validator_set import InvalidValidators, compile_validators
+
     file_path = os.path.join(work_dir, file_path)
-    validators = []
-
-    with open(file_path, "r") as file:
-        for line in file:
-            vs = line.strip().split(",")
-            if len(vs) != 5:
-                raise Exception(f"Invalid validator info: {line}")
-            validators.append(
-                {
-                    "consensusAddr": vs[0],
-                    "feeAddr": vs[1],
-                    "l2pFeeAddr": vs[2],
-                    "votingPower": vs[3],
-                    "bLSPublicKey": vs[4],
-                }
-            )
+    output_file = compiled_validators_path(file_path) if output_file is None else os.path.join(work_dir, output_file)
+    try:
+        with timings.span("validators"):
+            count = compile_validators(file_path, output_file)
+    except InvalidValidators as e:
+        print(e)
+        raise typer.Exit(code=1)
 
-    data = {
-        "validators": validators,
-    }
+    print(f"Generate validators successfully, {count} validator(s)")
+
+
+@main.command(help="Encode the init validator set bytes and the extraData of a validators file")
+def encode_validators(file_path: str = "./validators.conf"):
+    from scripts.validator_set import InvalidValidators, encode_validator_set, extra_data, parse_validators
+
+    try:
+        validators = list(parse_validators(os.path.join(work_dir, file_path)))
+    except InvalidValidators as e:
+        print(e)
+        raise typer.Exit(code=1)
+
+    print(f"init_validator_set_bytes: {encode_validator_set(validators).hex()}")
+    print(f"extraData: 0x{extra_data(validators).hex()}")
+
+
+error_annotation_prefix = "    // @notice signature: "
+error_pattern = re.compile(r"^\s{4}(error)\s([a-zA-Z]*\(.*\));\s$")
+error_params_pattern = re.compile(r"\((.*?)\)")
+error_annotation_pattern = re.compile(r"^\s{4}(//\s@notice\ssignature:)\s.*\s$")
+
+# the digests of the sources whose annotations were up to date at the last run
+error_sig_index_path = os.path.join(work_dir, ".cache", "error_sig.json")
 
-    generate_from_template(data, template_file, output_file)
-    print("Generate validators successfully")
+
+@functools.lru_cache(maxsize=None)
+def error_selector(signature):
+    from eth_hash.auto import keccak
+
+    return "0x" + keccak(signature.encode())[:4].hex()
+
+
+def canonical_error_signature(error_msg):
+    # remove variable names
+    match = error_params_pattern.search(error_msg)
+    if match and match.group(1) != "":
+        variables = [v.split()[0].strip() for v in match.group(1).split(",")]
+        error_msg = error_params_pattern.sub(f"({','.join(variables)})", error_msg)
+    return error_msg
+
+
+def annotate_errors(content):
+    lines = []
+    for line in content.splitlines(keepends=True):
+        if error_pattern.match(line):
+            annotation = error_annotation_prefix + error_selector(canonical_error_signature(line[10:-2])) + "\n"
+            # update/insert annotation
+            if lines and error_annotation_pattern.match(lines[-1]):
+                lines[-1] = annotation
+            else:
+                lines.append(annotation)
+        lines.append(line)
+    return "".join(lines)
 
 
 @main.command(help="Generate errors signature")
-def generate_error_sig(dir_path: str = "./contracts"):
+def generate_error_sig(
+    dir_path: str = "./contracts",
+    no_cache: Annotated[bool, typer.Option("--no-cache", help="Check every file, ignoring the index")] = False
+):
     dir_path = os.path.join(work_dir, dir_path)
 
-    annotation_prefix = "    // @notice signature: "
-    error_pattern = re.compile(r"^\s{4}(error)\s([a-zA-Z]*\(.*\));\s$")
-    annotation_pattern = re.compile(r"^\s{4}(//\s@notice\ssignature:)\s.*\s$")
-    for file in os.listdir(dir_path):
-        if file.endswith(".sol"):
-            file_path = os.path.join(dir_path, file)
-            with open(file_path) as f:
-                content = f.readlines()
-            for i, line in enumerate(content):
-                if error_pattern.match(line):
-                    error_msg = line[10:-2]
-                    # remove variable names
-                    match = re.search(r"\((.*?)\)", error_msg)
-                    if match and match.group(1) != "":
-                        variables = [v.split()[0].strip() for v in match.group(1).split(",")]
-                        error_msg = re.sub(r"\((.*?)\)", f"({','.join(variables)})", error_msg)
-                    sig = Web3.keccak(text=error_msg)[:4].hex()
-                    annotation = annotation_prefix + sig + "\n"
-                    # update/insert annotation
-                    if annotation_pattern.match(content[i - 1]):
-                        content[i - 1] = annotation
-                    else:
-                        content.insert(i, annotation)
-            with open(file_path, "w") as f:
-                f.writelines(content)
+    file_paths = []
+    for root, dirs, files in os.walk(dir_path):
+        # generated by `flatten`
+        dirs[:] = [d for d in dirs if d != "flattened"]
+        file_paths.extend(os.path.join(root, file) for file in files if file.endswith(".sol"))
+
+    index = {}
+    if not no_cache and os.path.exists(error_sig_index_path):
+        with open(error_sig_index_path, "r") as f:
+            index = json.load(f)
+
+    with ThreadPoolExecutor() as executor:
+        digests = dict(zip(file_paths, executor.map(genesis.file_digest, file_paths)))
+
+    updated = 0
+    for file_path, digest in digests.items():
+        key = os.path.relpath(file_path, work_dir)
+        if index.get(key) == digest:
+            continue
+
+        with open(file_path, "r") as f:
+            content = f.read()
+        annotated = annotate_errors(content)
+        if genesis.write_file_atomic(file_path, annotated):
+            updated += 1
+            digest = genesis.file_digest(file_path)
+        index[key] = digest
+
+    os.makedirs(os.path.dirname(error_sig_index_path), exist_ok=True)
+    genesis.write_file_atomic(error_sig_index_path, json.dumps(index, indent=2, sort_keys=True) + "\n")
+    print(f"Generate errors signature successfully, {updated} of {len(file_paths)} file(s) updated")
+
+
+# the closure digest of every flattened contract
+flatten_index_path = os.path.join(work_dir, ".cache", "flatten.json")
+
+
+@main.command(help="Flatten the system contracts of the genesis into contracts/flattened, skipping unchanged ones")
+def flatten(
+    jobs: Annotated[int, typer.Option(help="The number of forge flatten run at the same time")] = os.cpu_count() or 1,
+    no_cache: Annotated[bool, typer.Option("--no-cache", help="Flatten every contract, ignoring the index")] = False
+):
+    from scripts.flatten import FlattenIndex, closure_digest, forge_flatten
+
+    lib_dirs = [os.path.join(work_dir, "lib"), os.path.join(work_dir, "node_modules")]
+    toolchain = subprocess.run(["forge", "--version"], capture_output=True, text=True, check=True).stdout
+
+    index = FlattenIndex(flatten_index_path)
+    if no_cache:
+        index.digests = {}
+
+    # the same contracts as the genesis, whose sources are verified from these files
+    pending = {}
+    for contract in genesis.GENESIS_CONTRACTS:
+        source_path = os.path.join("contracts", contract.source)
+        output_path = os.path.join("contracts", "flattened", contract.source)
+        digest = closure_digest(os.path.join(work_dir, source_path), lib_dirs, work_dir, toolchain)
+        if not index.fresh(os.path.join(work_dir, output_path), digest):
+            pending[(source_path, output_path)] = digest
+
+    failed = []
+    with timings.span("flatten", subprocess=True), ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+        futures = {
+            executor.submit(forge_flatten, work_dir, source_path, output_path): (source_path, output_path)
+            for source_path, output_path in pending
+        }
+        for future, (source_path, output_path) in futures.items():
+            try:
+                future.result()
+            except subprocess.CalledProcessError as e:
+                failed.append(source_path)
+                print(f"Cannot flatten {source_path}:\n{e.stderr}")
+                continue
+            index.digests[os.path.join(work_dir, output_path)] = pending[(source_path, output_path)]
+    index.save()
+
+    if failed:
+        raise typer.Exit(code=1)
+    print(f"Flatten contracts successfully, {len(pending)} of {len(genesis.GENESIS_CONTRACTS)} contract(s) flattened")
+
+
+@main.command(help="Regenerate abi/ and the selector index of the system contracts from the forge artifacts")
+def generate_abi(
+    out_dir: Annotated[str, typer.Option(help="The artifacts of `forge build`")] = "./out",
+    abi_dir: Annotated[str, typer.Option(help="The abi files and the selector index")] = "./abi",
+    check: Annotated[bool, typer.Option("--check", help="Only report the stale files, failing if any")] = False
+):
+    from scripts import abi_index
+
+    out_dir = os.path.join(work_dir, out_dir)
+    abi_dir = os.path.join(work_dir, abi_dir)
+
+    with timings.span("read_abis"):
+        abis = abi_index.read_abis(out_dir)
+    entries = abi_index.build_index(abis)
+    contents = {file_name: abi_index.format_abi(abi).encode() for file_name, abi in abis.items()}
+    contents[abi_index.INDEX_JSON] = abi_index.index_json(entries).encode()
+    contents[abi_index.INDEX_TABLE] = abi_index.index_table(entries)
+
+    stale = []
+    for file_name, content in contents.items():
+        try:
+            with open(os.path.join(abi_dir, file_name), "rb") as f:
+                if f.read() == content:
+                    continue
+        except FileNotFoundError:
+            pass
+        stale.append(file_name)
+
+    if check:
+        for file_name in stale:
+            print(f"{os.path.relpath(os.path.join(abi_dir, file_name), work_dir)} is stale")
+        if stale:
+            print("Run `python -m scripts.generate generate-abi` after `forge build` and commit the abi files")
+            raise typer.Exit(code=1)
+        print(f"abi files up to date, {len(entries)} selector(s) and topic(s) indexed")
+        return
+
+    for file_name in stale:
+        genesis.replace_file(os.path.join(abi_dir, file_name), lambda f: f.write(contents[file_name]))
+    print(f"Generate abi files successfully, {len(stale)} of {len(contents)} file(s) updated, {len(entries)} indexed")
 
 
 if __name__ == "__main__":
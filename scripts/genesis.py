@@ -0,0 +1,303 @@
+import collections
+import filecmp
+import functools
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+
+SystemContract = collections.namedtuple("SystemContract", ["key", "source", "name", "address", "hardfork_name"])
+
+# the system contracts of the genesis: template key, source under contracts/, contract name, address and the name of
+# its bytecode file in the hardfork directories of the node repo
+GENESIS_CONTRACTS = [
+    SystemContract(
+        "validatorContract", "L2PValidatorSet.sol", "L2PValidatorSet", "0x0000000000000000000000000000000000001000",
+        "ValidatorContract"
+    ),
+    SystemContract(
+        "slashContract", "SlashIndicator.sol", "SlashIndicator", "0x0000000000000000000000000000000000001001",
+        "SlashContract"
+    ),
+    SystemContract(
+        "systemRewardContract", "SystemReward.sol", "SystemReward", "0x0000000000000000000000000000000000001002",
+        "SystemRewardContract"
+    ),
+    SystemContract(
+        "govHub", "GovHub.sol", "GovHub", "0x0000000000000000000000000000000000001007",
+        "GovHubContract"
+    ),
+    SystemContract(
+        "stakeHub", "StakeHub.sol", "StakeHub", "0x0000000000000000000000000000000000002002",
+        "StakeHubContract"
+    ),
+    SystemContract(
+        "stakeCredit", "StakeCredit.sol", "StakeCredit", "0x0000000000000000000000000000000000002003",
+        "StakeCreditContract"
+    ),
+    SystemContract(
+        "governor", "L2PGovernor.sol", "L2PGovernor", "0x0000000000000000000000000000000000002004",
+        "GovernorContract"
+    ),
+    SystemContract(
+        "govToken", "GovToken.sol", "GovToken", "0x0000000000000000000000000000000000002005",
+        "GovTokenContract"
+    ),
+    SystemContract(
+        "timelock", "L2PTimelock.sol", "L2PTimelock", "0x0000000000000000000000000000000000002006",
+        "TimelockContract"
+    ),
+    SystemContract(
+        "ensRegistry", "ens/ENSRegistry.sol", "ENSRegistry", "0x00000000000C2E074eC69A0dFb2997BA6C7d2e1e",
+        None
+    ),
+]
+
+holder_pattern = re.compile(r"address:\s*'(0x[0-9a-fA-F]{40})',\s*balance:\s*BigInt\('(\d+)'\)")
+# the start of every holder entry, read by `holder_pattern` or not
+holder_entry_pattern = re.compile(r"\baddress\s*:")
+# an account of the alloc written out in the genesis template
+alloc_address_pattern = re.compile(r'^\s*"(0x[0-9a-fA-F]{40})"\s*:\s*\{', re.MULTILINE)
+
+
+def contract_name(address):
+    # the name of a system contract by its address, as reported by the checks against the node repo
+    for contract in GENESIS_CONTRACTS:
+        if contract.address.lower() == address.lower():
+            return contract.hardfork_name or contract.name
+    return None
+
+
+def artifact_path(out_dir, contract):
+    # forge names the artifact directory after the source file, whatever its directory under contracts/
+    return os.path.join(out_dir, os.path.basename(contract.source), f"{contract.name}.json")
+
+
+def read_bytecode(out_dir, contract):
+    with open(artifact_path(out_dir, contract), "r") as f:
+        artifact = json.load(f)
+    return artifact["deployedBytecode"]["object"]
+
+
+def read_bytecodes(out_dir):
+    return {contract.key: read_bytecode(out_dir, contract) for contract in GENESIS_CONTRACTS}
+
+
+def template_addresses(template_file):
+    """
+    The addresses of the accounts the genesis template allocates itself: the system contracts, the coinbase and
+    multicall, which no init holder can be at.
+    """
+    with open(template_file, "r") as f:
+        return alloc_address_pattern.findall(f.read())
+
+
+def read_init_holders(file_path):
+    """
+    Read the holders rendered into init_holders.js by `generate-init-holders`, with their balance as a hex string.
+    Entries edited into another form are rejected rather than left out of the genesis.
+    """
+    with open(file_path, "r") as f:
+        content = f.read()
+
+    holders = {}
+    for match in holder_pattern.finditer(content):
+        holders[match.start()] = {"address": match.group(1), "balance": f"{int(match.group(2)):x}"}
+    for entry in holder_entry_pattern.finditer(content):
+        if entry.start() not in holders:
+            line = content.count("\n", 0, entry.start()) + 1
+            raise Exception(
+                f"Invalid init holder at {file_path}:{line}, expected address: '0x...', balance: BigInt('<wei>')"
+            )
+    if not holders:
+        raise Exception(f"No init holder in {file_path}")
+
+    return list(holders.values())
+
+
+@functools.lru_cache(maxsize=None)
+def load_template(template_file):
+    import jinja2
+
+    with open(template_file, "r", newline="") as f:
+        source = f.read()
+
+    # render with the line endings of the template, like nunjucks did
+    newline_sequence = "\r\n" if "\r\n" in source else "\n"
+    template_env = jinja2.Environment(autoescape=True, keep_trailing_newline=True, newline_sequence=newline_sequence)
+    return template_env.from_string(source)
+
+
+def replace_file(output_file, write):
+    """
+    Write `output_file` in binary with `write(f)` through a temporary file, leaving the file and its mtime alone when
+    nothing changed.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output_file)), prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+
+        if not os.path.exists(output_file):
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, output_file)
+        elif filecmp.cmp(tmp_path, output_file, shallow=False):
+            os.remove(tmp_path)
+        else:
+            shutil.copymode(output_file, tmp_path)
+            os.replace(tmp_path, output_file)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_file_atomic(output_file, content):
+    """
+    Write the text `content` to `output_file` through a temporary file, skipping the write if the file is unchanged.
+    Returns whether the file was written.
+    """
+    try:
+        with open(output_file, "r") as f:
+            if f.read() == content:
+                return False
+    except FileNotFoundError:
+        pass
+
+    replace_file(output_file, lambda f: f.write(content.encode()))
+    return True
+
+
+def write_genesis(template_file, data, output_file):
+    """
+    Stream the rendered genesis into `output_file`, leaving the file and its mtime alone when nothing changed.
+    """
+    replace_file(output_file, lambda f: load_template(template_file).stream(data).dump(f, encoding="utf-8"))
+
+
+def canonical_genesis(genesis):
+    # alloc addresses are case insensitive, they are lower cased for the same state to always have the same document
+    genesis = dict(genesis, alloc={address.lower(): account for address, account in genesis["alloc"].items()})
+    return json.dumps(genesis, sort_keys=True, separators=(",", ":")).encode()
+
+
+def generate_genesis(
+    bytecodes,
+    template_file,
+    output_file,
+    chain_id,
+    ens_registry_owner,
+    extra_data,
+    init_holders,
+    storage=None,
+    canonical=False,
+):
+    data = {
+        "chainId": f"{chain_id}",
+        "initHolders": init_holders,
+        "extraData": extra_data,
+        "ensRegistryOwner": ens_registry_owner[2:].lower(),
+        # the storage slots of the system contracts by template key, set when they are pre-initialized
+        "storage": storage or {},
+    }
+    data.update(bytecodes)
+
+    if not canonical:
+        write_genesis(template_file, data, output_file)
+        return
+
+    # canonical json: minified with sorted keys, which has to parse the whole rendered document
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output_file)), prefix=".") as tmp_dir:
+        rendered_file = os.path.join(tmp_dir, "genesis.json")
+        write_genesis(template_file, data, rendered_file)
+        with open(rendered_file, "r") as f:
+            content = canonical_genesis(json.load(f))
+    replace_file(output_file, lambda f: f.write(content))
+
+
+# the compressions of the genesis, by the extension of the compressed file
+COMPRESSIONS = {"gzip": ".gz", "zstd": ".zst"}
+
+CHUNK_SIZE = 1 << 20
+
+
+def zstandard_module():
+    try:
+        import zstandard
+    except ImportError:
+        raise Exception("zstd compression requires the zstandard package: pip install zstandard")
+    return zstandard
+
+
+def file_digest(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def compress_genesis(genesis_file, compression):
+    """
+    Write `genesis_file` compressed next to it, without any timestamp so that a genesis always compresses to the same
+    bytes, and a sha256sum sidecar of both files. Return the path of the compressed file.
+    """
+    output_file = genesis_file + COMPRESSIONS[compression]
+
+    def write(f):
+        with open(genesis_file, "rb") as src:
+            if compression == "gzip":
+                with gzip.GzipFile(filename="", mode="wb", fileobj=f, mtime=0) as dst:
+                    shutil.copyfileobj(src, dst, CHUNK_SIZE)
+            else:
+                with zstandard_module().ZstdCompressor(level=19).stream_writer(f, closefd=False) as dst:
+                    shutil.copyfileobj(src, dst, CHUNK_SIZE)
+
+    replace_file(output_file, write)
+
+    sidecar = "".join(
+        f"{file_digest(file_path)}  {os.path.basename(file_path)}\n" for file_path in (genesis_file, output_file)
+    )
+    replace_file(genesis_file + ".sha256", lambda f: f.write(sidecar.encode()))
+    return output_file
+
+
+def read_genesis_bytes(genesis_file):
+    # the document of a genesis, compressed or not
+    with open(genesis_file, "rb") as f:
+        content = f.read()
+    if genesis_file.endswith(COMPRESSIONS["gzip"]):
+        return gzip.decompress(content)
+    if genesis_file.endswith(COMPRESSIONS["zstd"]):
+        return zstandard_module().ZstdDecompressor().decompressobj().decompress(content)
+    return content
+
+
+def size_report(genesis_file):
+    """
+    The size of a genesis file and of its document, the time to parse it and the code size in bytes of every account
+    with code, largest first.
+    """
+    content = read_genesis_bytes(genesis_file)
+    start = time.perf_counter()
+    genesis = json.loads(content)
+    parse_time = time.perf_counter() - start
+
+    code_sizes = []
+    for address, account in genesis["alloc"].items():
+        code = account.get("code", "")
+        code = code[2:] if code.startswith("0x") else code
+        if code:
+            code_sizes.append((address, len(code) // 2))
+
+    return {
+        "file_size": os.path.getsize(genesis_file),
+        "document_size": len(content),
+        "parse_time": parse_time,
+        "accounts": len(genesis["alloc"]),
+        "code_sizes": sorted(code_sizes, key=lambda code_size: -code_size[1]),
+    }
@@ -0,0 +1,137 @@
+import hashlib
+import itertools
+import json
+
+CHUNK_SIZE = 64 * 1024
+
+ACCOUNT_FIELDS = ("code", "balance", "storage")
+
+decoder = json.JSONDecoder()
+
+
+class JsonStream:
+    """
+    A buffered reader decoding one JSON value at a time, so that a genesis is never loaded as a whole.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        chunk = self.f.read(CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if self.eof:
+                raise ValueError("unexpected end of genesis")
+            self.fill()
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"expected {char!r} at {self.buf[self.pos:self.pos + 32]!r}")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buf, self.pos)
+                # a number could go on in the next chunk
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+    def members(self):
+        """
+        Iterate the keys of the object at the current position, the caller consumes each value.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("}")
+            return
+
+
+def normalize_address(address):
+    address = address.lower()
+    return address[2:] if address.startswith("0x") else address
+
+
+def digest(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode()).hexdigest()
+
+
+def account_digests(account):
+    return {field: digest(account.get(field)) for field in ACCOUNT_FIELDS}
+
+
+def iter_genesis(file_path):
+    """
+    Yield ("field", name, digest) for the top level fields and ("account", address, digests) for the accounts of the
+    alloc, in file order.
+    """
+    with open(file_path, "r") as f:
+        stream = JsonStream(f)
+        for key in stream.members():
+            if key != "alloc":
+                yield "field", key, digest(stream.value())
+                continue
+            for address in stream.members():
+                yield "account", normalize_address(address), account_digests(stream.value())
+
+
+def diff_genesis(expected_file, actual_file, fail_fast=False):
+    """
+    Compare two genesis files entry by entry, yielding (kind, name, fields) for every top level field or account
+    that differs or is missing on either side. The files are read in lockstep and only the digests of the entries not
+    matched yet are held, so identical files are compared in a single pass. With `fail_fast` it stops at the first
+    difference.
+    """
+    pending = ({}, {})
+    for entries in itertools.zip_longest(iter_genesis(expected_file), iter_genesis(actual_file)):
+        for side, entry in enumerate(entries):
+            if entry is None:
+                continue
+            kind, name, digests = entry
+            other = pending[1 - side].pop((kind, name), None)
+            if other is None:
+                pending[side][(kind, name)] = digests
+                continue
+
+            if kind == "field":
+                fields = [] if other == digests else ["value"]
+            else:
+                fields = [field for field in ACCOUNT_FIELDS if other[field] != digests[field]]
+            if fields:
+                yield kind, name, fields
+                if fail_fast:
+                    return
+
+    for side, label in enumerate(("missing", "unexpected")):
+        for kind, name in pending[side]:
+            yield kind, name, [label]
+            if fail_fast:
+                return
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from scripts.genesis import GENESIS_CONTRACTS, write_file_atomic
+from scripts.genesis_diff import JsonStream, normalize_address
+
+# the directories of the bytecode of every hardfork in the node repo
+SYSTEM_CONTRACTS_DIR = os.path.join("core", "systemcontracts")
+
+
+def normalize_code(code):
+    code = code.strip().lower()
+    return code[2:] if code.startswith("0x") else code
+
+
+def code_digest(code):
+    return hashlib.sha256(normalize_code(code).encode()).hexdigest()
+
+
+def genesis_code_digests(genesis_file):
+    """
+    The digest of the code of every system contract in a genesis, by the name of its file in the hardfork directories.
+    The genesis is streamed, so that large allocs are not loaded.
+    """
+    names = {normalize_address(contract.address): contract.hardfork_name for contract in GENESIS_CONTRACTS}
+    digests = {}
+    with open(genesis_file, "r") as f:
+        stream = JsonStream(f)
+        for key in stream.members():
+            if key != "alloc":
+                stream.value()
+                continue
+            for address in stream.members():
+                account = stream.value()
+                name = names.get(normalize_address(address))
+                if name and "code" in account:
+                    digests[name] = code_digest(account["code"])
+    return digests
+
+
+def hardfork_files(repo_dir, hardforks, network_dirs):
+    """
+    Yield (hardfork, network dir, contract file name, path) for the bytecode files of the system contracts in the node
+    repo, for every hardfork when `hardforks` is empty.
+    """
+    names = {contract.hardfork_name for contract in GENESIS_CONTRACTS if contract.hardfork_name}
+    root_dir = os.path.join(repo_dir, SYSTEM_CONTRACTS_DIR)
+    for hardfork in hardforks or sorted(os.listdir(root_dir)):
+        for network_dir in network_dirs:
+            for root, dirs, files in os.walk(os.path.join(root_dir, hardfork, network_dir)):
+                dirs.sort()
+                for file in sorted(files):
+                    if file in names:
+                        yield hardfork, network_dir, file, os.path.join(root, file)
+
+
+def hardfork_order(repo_dir):
+    """
+    The hardforks of the node repo from the oldest to the latest, in the order their directories were added in its
+    history.
+    """
+    result = subprocess.run(
+        ["git", "log", "--reverse", "--no-renames", "--diff-filter=A", "--name-only", "--format=", "--",
+         SYSTEM_CONTRACTS_DIR],
+        cwd=repo_dir,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise Exception(f"Cannot read the history of {repo_dir} to order its hardforks: {result.stderr.strip()}")
+
+    order = []
+    for line in result.stdout.splitlines():
+        # core/systemcontracts/<hardfork>/<network dir>/..., the go sources of the package are left out
+        parts = line.split("/")
+        if len(parts) > 3 and parts[2] not in order:
+            order.append(parts[2])
+    return order
+
+
+def latest_files(files, order):
+    """
+    The path of the bytecode file of the latest hardfork holding each contract, by (network dir, contract file name),
+    out of the files of `hardfork_files`. That is the only code the current genesis is expected to match.
+    """
+    rank = {hardfork: i for i, hardfork in enumerate(order)}
+    latest = {}
+    for hardfork, network_dir, name, file_path in files:
+        if hardfork not in rank:
+            raise Exception(f"Cannot find when hardfork {hardfork} was added to the node repo")
+        if (network_dir, name) not in latest or rank[hardfork] > latest[(network_dir, name)][0]:
+            latest[(network_dir, name)] = (rank[hardfork], file_path)
+    return {key: file_path for key, (_, file_path) in latest.items()}
+
+
+def file_code_digest(file_path):
+    with open(file_path, "r") as f:
+        return code_digest(f.read())
+
+
+class DigestCache:
+    """
+    The code digests of the bytecode files by path, reused as long as the size and the mtime of the file are the same.
+    """
+
+    def __init__(self, cache_file):
+        self.cache_file = cache_file
+        try:
+            with open(cache_file, "r") as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.entries = {}
+
+    def digests(self, file_paths):
+        """
+        The digests of `file_paths`, hashing the files that changed since the last run in a pool of threads.
+        """
+        stats = {file_path: os.stat(file_path) for file_path in file_paths}
+        digests = {}
+        stale = []
+        for file_path, stat in stats.items():
+            entry = self.entries.get(file_path)
+            if entry and entry[:2] == [stat.st_size, stat.st_mtime_ns]:
+                digests[file_path] = entry[2]
+            else:
+                stale.append(file_path)
+
+        with ThreadPoolExecutor() as executor:
+            for file_path, digest in zip(stale, executor.map(file_code_digest, stale)):
+                stat = stats[file_path]
+                self.entries[file_path] = [stat.st_size, stat.st_mtime_ns, digest]
+                digests[file_path] = digest
+
+        return digests, len(stale)
+
+    def save(self):
+        # forget the files gone since, e.g. with another checkout of the node repo
+        self.entries = {file_path: entry for file_path, entry in self.entries.items() if os.path.exists(file_path)}
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+        write_file_atomic(self.cache_file, json.dumps(self.entries))
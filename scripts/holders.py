@@ -0,0 +1,127 @@
+import csv
+import heapq
+import json
+import os
+import tempfile
+
+# the number of distinct addresses summed in memory before they are spilled into a sorted run on disk
+RUN_SIZE = 100_000
+
+
+def parse_balance(value):
+    if isinstance(value, int):
+        balance = value
+    else:
+        value = value.strip()
+        balance = int(value, 16) if value.lower().startswith("0x") else int(value)
+    if balance < 0:
+        raise ValueError(f"negative balance {value}")
+    return balance
+
+
+def parse_address(value):
+    address = value.strip().lower()
+    if not address.startswith("0x"):
+        address = "0x" + address
+    if len(address) != 42:
+        raise ValueError(f"invalid address {value}")
+    bytes.fromhex(address[2:])
+    return address
+
+
+def read_holders_file(file_path):
+    """
+    Iterate the (address, balance) rows of a csv file of `address,balance` rows, with an optional header, or of a jsonl
+    file of `{"address": ..., "balance": ...}` objects. Balances are decimal or 0x prefixed hex integers in wei.
+    """
+    with open(file_path, "r", newline="") as f:
+        if file_path.endswith(".jsonl"):
+            rows = ((n, json.loads(line)) for n, line in enumerate(f, 1) if line.strip())
+            rows = ((n, (row["address"], row["balance"])) for n, row in rows)
+        else:
+            rows = ((n, row) for n, row in enumerate(csv.reader(f), 1) if row)
+
+        for line_number, row in rows:
+            try:
+                if len(row) != 2:
+                    raise ValueError(f"expected 2 fields, got {len(row)}")
+                if line_number == 1 and row[0].strip().lower() == "address":
+                    continue
+                yield parse_address(row[0]), parse_balance(row[1])
+            except (ValueError, KeyError) as e:
+                raise Exception(f"Invalid init holder at {file_path}:{line_number}: {e}")
+
+
+def write_run(runs_dir, balances):
+    fd, run_path = tempfile.mkstemp(dir=runs_dir, suffix=".run")
+    with os.fdopen(fd, "w") as f:
+        for address in sorted(balances):
+            f.write(f"{address} {balances[address]:x}\n")
+    return run_path
+
+
+def read_run(run_path):
+    with open(run_path, "r") as f:
+        for line in f:
+            address, balance = line.split()
+            yield address, int(balance, 16)
+
+
+def merge_holders(rows, run_size=RUN_SIZE):
+    """
+    Sum the balances of duplicate addresses, yielding (address, balance) ordered by address. Rows are summed in memory
+    up to `run_size` distinct addresses at a time and spilled into sorted runs on disk, which are merged at the end, so
+    memory stays bounded whatever the number of holders.
+    """
+    balances = {}
+    with tempfile.TemporaryDirectory(prefix="holders-") as runs_dir:
+        runs = []
+        for address, balance in rows:
+            balances[address] = balances.get(address, 0) + balance
+            if len(balances) >= run_size:
+                runs.append(write_run(runs_dir, balances))
+                balances = {}
+
+        if not runs:
+            yield from sorted(balances.items())
+            return
+        if balances:
+            runs.append(write_run(runs_dir, balances))
+        balances = None
+
+        merged = heapq.merge(*(read_run(run) for run in runs))
+        current, total = next(merged)
+        for address, balance in merged:
+            if address == current:
+                total += balance
+                continue
+            yield current, total
+            current, total = address, balance
+        yield current, total
+
+
+class HolderStats:
+    """
+    The number of accounts and the total supply of the holders passed through `count`, as they are written.
+    """
+
+    def __init__(self):
+        self.accounts = 0
+        self.total_supply = 0
+
+    def count(self, holders):
+        for holder in holders:
+            self.accounts += 1
+            self.total_supply += int(holder["balance"], 16)
+            yield holder
+
+
+def init_holders(file_path, reserved_addresses=()):
+    """
+    The init holders of a csv or jsonl file in the form of `genesis.read_init_holders`, merged and streamed.
+    """
+    reserved = {address.lower() for address in reserved_addresses}
+    for address, balance in merge_holders(read_holders_file(file_path)):
+        if address in reserved:
+            raise Exception(f"Init holder {address} is an account of the genesis template")
+        yield {"address": address, "balance": f"{balance:x}"}
@@ -0,0 +1,210 @@
+import collections
+import contextlib
+import gzip
+import json
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+
+from web3 import Web3
+
+from scripts.genesis import GENESIS_CONTRACTS
+
+# the accounts whose storage the template can fill, the ENS registry has its own
+PREINIT_CONTRACTS = {
+    contract.address.lower(): contract.key for contract in GENESIS_CONTRACTS if contract.hardfork_name
+}
+
+# the coinbase of the genesis template
+SYSTEM_SENDER = "0xffffFFFfFFffffffffffffffFfFFFfffFFFfFFfE"
+
+SLASH_CONTRACT = next(contract.address for contract in GENESIS_CONTRACTS if contract.key == "slashContract")
+
+# `lazy` initializers are not system transactions but the first call of a contract running its doInit: they may
+# revert, leaving the initialization to the chain, and can be called again once done
+Initializer = collections.namedtuple("Initializer", ["key", "signature", "args", "sender", "lazy"])
+
+# the initializers the consensus engine calls as system transactions, from the block producer with a zero gas price:
+# the init of the first block, then the initialize of the hard forks
+INITIALIZERS = [
+    Initializer("validatorContract", "init()", b"", SYSTEM_SENDER, False),
+    Initializer("slashContract", "init()", b"", SYSTEM_SENDER, False),
+    Initializer("stakeHub", "initialize()", b"", SYSTEM_SENDER, False),
+    Initializer("governor", "initialize()", b"", SYSTEM_SENDER, False),
+    Initializer("govToken", "initialize()", b"", SYSTEM_SENDER, False),
+    Initializer("timelock", "initialize()", b"", SYSTEM_SENDER, False),
+    # the operators of SystemReward are set by its doInit on the first claim of an operator. Only dev has operators
+    # from the genesis on, the slash contract among them, so a claim of nothing sets them there and reverts elsewhere
+    Initializer(
+        "systemRewardContract",
+        "claimRewards(address,uint256)",
+        bytes(12) + bytes.fromhex(SYSTEM_SENDER[2:]) + bytes(32),
+        SLASH_CONTRACT,
+        True,
+    ),
+]
+
+ANVIL_TIMEOUT = 30
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextlib.contextmanager
+def anvil(genesis_file):
+    """
+    A local anvil node started from `genesis_file`, with a zero base fee.
+    """
+    if shutil.which("anvil") is None:
+        raise Exception("anvil of foundry is required to pre-initialize the genesis")
+
+    port = free_port()
+    process = subprocess.Popen(
+        [
+            "anvil", "--init", genesis_file, "--port", str(port), "--base-fee", "0", "--gas-price", "0",
+            # the system transactions of the node are not bound by the gas limit of the block
+            "--disable-block-gas-limit", "--silent"
+        ],
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        w3 = Web3(Web3.HTTPProvider(f"http://127.0.0.1:{port}"))
+        deadline = time.monotonic() + ANVIL_TIMEOUT
+        while not w3.is_connected():
+            if process.poll() is not None:
+                raise Exception(f"anvil exited with {process.returncode} on {genesis_file}")
+            if time.monotonic() > deadline:
+                raise Exception(f"anvil did not start within {ANVIL_TIMEOUT}s")
+            time.sleep(0.1)
+        yield w3
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def rpc(w3, method, params):
+    response = w3.provider.make_request(method, params)
+    if "error" in response:
+        raise Exception(f"{method} failed: {response['error']}")
+    return response["result"]
+
+
+def normalize_word(value):
+    return f"0x{int(value, 16):064x}"
+
+
+def dump_storage(w3):
+    # the storage of every account of the node, by lower case address
+    state = json.loads(gzip.decompress(bytes.fromhex(rpc(w3, "anvil_dumpState", [])[2:])))
+    return {
+        address.lower(): {
+            normalize_word(slot): normalize_word(value) for slot, value in account.get("storage", {}).items()
+        } for address, account in state["accounts"].items()
+    }
+
+
+def impersonate_senders(w3):
+    # the onlyCoinbase initializers are sent by the block producer
+    rpc(w3, "anvil_setCoinbase", [SYSTEM_SENDER])
+    for sender in sorted({initializer.sender for initializer in INITIALIZERS}):
+        rpc(w3, "anvil_impersonateAccount", [sender])
+
+
+def initializer_call(initializer):
+    address = next(contract.address for contract in GENESIS_CONTRACTS if contract.key == initializer.key)
+    return {
+        "from": Web3.to_checksum_address(initializer.sender),
+        "to": Web3.to_checksum_address(address),
+        "data": Web3.keccak(text=initializer.signature)[:4] + initializer.args,
+        "gasPrice": 0,
+    }
+
+
+def call_initializers(w3):
+    """
+    Run the initializers in block 1, the block in which the node sends its init system transactions, so that what
+    they record of the block, e.g. the checkpoints keyed by its number, is what the chain would hold.
+    """
+    impersonate_senders(w3)
+    # no block is mined until every initializer is pending
+    rpc(w3, "evm_setAutomine", [False])
+    tx_hashes = [
+        w3.eth.send_transaction(dict(initializer_call(initializer), gas=30_000_000)) for initializer in INITIALIZERS
+    ]
+    rpc(w3, "evm_mine", [])
+
+    for initializer, tx_hash in zip(INITIALIZERS, tx_hashes):
+        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        if receipt["blockNumber"] != 1:
+            raise Exception(f"{initializer.signature} of {initializer.key} ran in block {receipt['blockNumber']}")
+        if receipt["status"] != 1 and not initializer.lazy:
+            raise Exception(f"{initializer.signature} of {initializer.key} reverted")
+
+
+def check_initialized(w3):
+    # on a pre-initialized chain, the initializers of the system transactions have nothing left to do
+    impersonate_senders(w3)
+    for initializer in INITIALIZERS:
+        if initializer.lazy:
+            continue
+        try:
+            w3.eth.call(initializer_call(initializer))
+        except Exception:
+            continue
+        raise Exception(
+            f"{initializer.signature} of {initializer.key} can still be called on the pre-initialized genesis"
+        )
+
+
+def initialized_state(genesis_file):
+    # the storage of a node started from `genesis_file`, before and after the initializers ran in block 1
+    with anvil(genesis_file) as w3:
+        before = dump_storage(w3)
+        call_initializers(w3)
+        return before, dump_storage(w3)
+
+
+def initialized_storage(render):
+    """
+    Run the initializers of the system contracts in block 1 of a local anvil node and return the storage slots they
+    set, by template key. `render(output_file, storage)` writes the genesis with the given storage.
+
+    The storage is checked against a reference run of the same block 1 on another node, which catches state depending
+    on the node rather than on the genesis, such as the time block 1 is mined at. A node started from the genesis
+    rendered with the storage then has to hold the very same state, and the initializers have to revert on it.
+    """
+    with tempfile.TemporaryDirectory(prefix="preinit-") as tmp_dir:
+        plain_file = os.path.join(tmp_dir, "genesis.json")
+        render(plain_file, {})
+        before, after = initialized_state(plain_file)
+
+        storage = {}
+        for address, slots in after.items():
+            if slots == before.get(address, {}):
+                continue
+            if address not in PREINIT_CONTRACTS:
+                raise Exception(f"The initializers changed the storage of {address}, which the genesis cannot hold")
+            storage[PREINIT_CONTRACTS[address]] = dict(sorted(slots.items()))
+
+        _, reference = initialized_state(plain_file)
+        for address, key in PREINIT_CONTRACTS.items():
+            if reference.get(address, {}) != after.get(address, {}):
+                raise Exception(f"The storage of {key} set in block 1 differs between two runs of its initializers")
+
+        preinit_file = os.path.join(tmp_dir, "genesis-preinit.json")
+        render(preinit_file, storage)
+        with anvil(preinit_file) as w3:
+            preinitialized = dump_storage(w3)
+            check_initialized(w3)
+
+        for address, key in PREINIT_CONTRACTS.items():
+            if preinitialized.get(address, {}) != after.get(address, {}):
+                raise Exception(f"The pre-initialized storage of {key} differs from the state after its initializers")
+
+    return storage
@@ -0,0 +1,91 @@
+import collections
+import json
+import re
+
+from scripts.genesis import GENESIS_CONTRACTS, artifact_path
+
+# the size limit of the deployed code of contracts created by transactions, which the genesis does not enforce
+CODE_SIZE_LIMIT = 24576
+
+# `Test:test() (gas: 1234)`, or `Test:testFuzz(uint256) (runs: 256, μ: 1234, ~: 1200)` for fuzz tests, whose mean is
+# taken
+gas_pattern = re.compile(r"^(\S+) \((?:gas: (\d+)|runs: \d+, μ: (\d+), ~: \d+)\)$")
+
+Delta = collections.namedtuple("Delta", ["name", "before", "after"])
+
+
+def code_size(code):
+    return len(code[2:] if code.startswith("0x") else code) // 2
+
+
+def artifact_sizes(out_dir):
+    """
+    The size in bytes of the creation code and of the deployed code of every genesis contract built in `out_dir`.
+    """
+    sizes = {}
+    for contract in GENESIS_CONTRACTS:
+        try:
+            with open(artifact_path(out_dir, contract), "r") as f:
+                artifact = json.load(f)
+        except FileNotFoundError:
+            raise Exception(f"Cannot find the artifact of {contract.name} in {out_dir}, generate the network first")
+        sizes[contract.name] = {
+            "initcode": code_size(artifact["bytecode"]["object"]),
+            "runtime": code_size(artifact["deployedBytecode"]["object"]),
+        }
+    return sizes
+
+
+def read_gas_snapshot(file_path):
+    """
+    The gas of every test of a `forge snapshot` file, by `Contract:test()`. Invariant tests have no gas and are left
+    out.
+    """
+    gas = {}
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            match = gas_pattern.match(line.strip())
+            if match:
+                gas[match.group(1)] = int(match.group(2) or match.group(3))
+    return gas
+
+
+def flatten_report(report):
+    # one value by readable name, in the order of the report
+    values = {}
+    for network, sizes in report.get("sizes", {}).items():
+        for contract, kinds in sizes.items():
+            for kind, size in kinds.items():
+                values[f"{contract} {kind} ({network})"] = size
+    for test, gas in report.get("gas", {}).items():
+        values[f"gas {test}"] = gas
+    return values
+
+
+def compare(baseline, report):
+    """
+    The deltas of a report from the baseline, including what is only in one of them, whose value on the other side is
+    None. Only the networks of the report are compared, and the gas when the report has any.
+    """
+    baseline = {
+        "sizes": {network: sizes for network, sizes in baseline.get("sizes", {}).items() if network in report["sizes"]},
+        "gas": baseline.get("gas", {}) if "gas" in report else {},
+    }
+    before, after = flatten_report(baseline), flatten_report(report)
+    names = list(after) + [name for name in before if name not in after]
+    return [Delta(name, before.get(name), after.get(name)) for name in names if before.get(name) != after.get(name)]
+
+
+def merge(baseline, report):
+    # the baseline updated with the networks and the gas of the report
+    baseline = dict(baseline, sizes=dict(baseline.get("sizes", {}), **report["sizes"]))
+    if "gas" in report:
+        baseline["gas"] = report["gas"]
+    return baseline
+
+
+def exceeds(delta, threshold):
+    # a new or removed value is reported but never fails the check
+    if delta.before is None or delta.after is None:
+        return False
+    return delta.after > delta.before * (1 + threshold / 100)
@@ -0,0 +1,65 @@
+import json
+import os
+
+from scripts import abi_index
+from scripts.generate import work_dir
+
+
+def committed_abi(file_name):
+    with open(os.path.join(work_dir, "abi", file_name), "r") as f:
+        return json.load(f)
+
+
+def test_format_abi_as_committed():
+    with open(os.path.join(work_dir, "abi", "stakehub.abi"), "r") as f:
+        assert abi_index.format_abi(committed_abi("stakehub.abi")) == f.read()
+
+
+def test_signatures():
+    abi = [
+        {
+            "type": "error",
+            "name": "InvalidValue",
+            "inputs": [{"name": "key", "type": "string"}, {"name": "value", "type": "bytes"}],
+        },
+        {
+            "type": "function",
+            "name": "aggregate",
+            "inputs": [{
+                "name": "calls",
+                "type": "tuple[]",
+                "components": [{"name": "target", "type": "address"}, {"name": "data", "type": "bytes"}],
+            }],
+        },
+        {"type": "event", "name": "Anonymous", "inputs": [], "anonymous": True},
+        {"type": "receive", "stateMutability": "payable"},
+    ]
+
+    entries = list(abi_index.abi_entries("Test", abi))
+
+    # as annotated by `generate-error-sig` in contracts/SystemV2.sol
+    assert [(kind, key.hex(), text) for kind, key, _, text in entries] == [
+        ("error", "0a5a6041", "InvalidValue(string,bytes)"),
+        ("function", "252dba42", "aggregate((address,bytes)[])"),
+    ]
+
+
+def test_selector_table(tmp_path):
+    abis = {file_name: committed_abi(file_name) for file_name in ("stakehub.abi", "l2pgovernor.abi")}
+    entries = abi_index.build_index(abis)
+    (tmp_path / "selectors.bin").write_bytes(abi_index.index_table(entries))
+    index = json.loads(abi_index.index_json(entries))
+
+    table = abi_index.SelectorTable(str(tmp_path / "selectors.bin"))
+    try:
+        assert len(table) == len(entries)
+        for kind in abi_index.KINDS:
+            for key, matches in index[f"{kind}s"].items():
+                assert table.lookup(key) == [(kind, contract, text) for contract, text in matches]
+        # shared by both contracts
+        assert table.lookup(bytes.fromhex("06fbb1e3")) == [
+            ("error", "L2PGovernor", "OnlyProtector()"), ("error", "StakeHub", "OnlyProtector()")
+        ]
+        assert table.lookup("0x00000000") == []
+    finally:
+        table.close()
@@ -0,0 +1,113 @@
+import os
+import random
+
+import pytest
+
+from scripts import genesis, holders
+from scripts.generate import ContractPatch, generate_from_template, work_dir
+from scripts.validator_set import (
+    compile_validators, encode_validator_set, extra_data, parse_validators, read_compiled_validators
+)
+
+pytest.importorskip("pytest_benchmark")
+
+PARAMETERS = 2000
+
+
+def random_address(rand):
+    return "0x" + rand.randbytes(20).hex()
+
+
+def write_validators(file_path, n):
+    rand = random.Random(n)
+    with open(file_path, "w") as f:
+        for _ in range(n):
+            f.write(
+                f"{random_address(rand)},{random_address(rand)},{random_address(rand)},{rand.randrange(2**40)},"
+                f"0x{rand.randbytes(48).hex()}\n"
+            )
+
+
+@pytest.fixture
+def holders_file(tmp_path):
+    rand = random.Random(0)
+    file_path = tmp_path / "init_holders.js"
+    data = {"initHolders": [random_address(rand) for _ in range(100_000)]}
+    generate_from_template(data, "scripts/init_holders.template", str(file_path))
+    return str(file_path)
+
+
+def test_patch_many_parameters(benchmark):
+    content = "contract Params {\n" + "".join(
+        f"    uint256 public constant PARAM_{i} = {i};\n" for i in range(PARAMETERS)
+    ) + "}\n"
+    patch = ContractPatch("Params.sol")
+    for i in range(PARAMETERS):
+        patch.replace_parameter(f"PARAM_{i}", str(i + 1))
+
+    patched = benchmark(patch.apply, content)
+
+    lines = patched.splitlines()
+    assert lines[1] == "    uint256 public constant PARAM_0 = 1;"
+    assert lines[PARAMETERS] == f"    uint256 public constant PARAM_{PARAMETERS - 1} = {PARAMETERS};"
+
+
+@pytest.mark.parametrize("n", [10, 1000, 10000])
+def test_parse_validators(benchmark, tmp_path, n):
+    file_path = str(tmp_path / "validators.conf")
+    write_validators(file_path, n)
+
+    assert len(benchmark(lambda: list(parse_validators(file_path)))) == n
+
+
+@pytest.mark.parametrize("n", [10, 1000, 10000])
+def test_compile_validators(benchmark, tmp_path, n):
+    file_path = str(tmp_path / "validators.conf")
+    write_validators(file_path, n)
+
+    assert benchmark(compile_validators, file_path, str(tmp_path / "validators.bin")) == n
+
+
+@pytest.mark.parametrize("n", [10, 1000, 10000])
+def test_encode_validators(benchmark, tmp_path, n):
+    file_path = str(tmp_path / "validators.conf")
+    write_validators(file_path, n)
+    compile_validators(file_path, str(tmp_path / "validators.bin"))
+    validators = list(read_compiled_validators(str(tmp_path / "validators.bin")))
+
+    _, extra = benchmark(lambda: (encode_validator_set(validators), extra_data(validators)))
+
+    assert len(extra) == 32 + 20 * n + 65
+
+
+def test_read_init_holders(benchmark, holders_file):
+    assert len(benchmark(genesis.read_init_holders, holders_file)) == 100_000
+
+
+def test_merge_holders_file(benchmark, tmp_path):
+    rand = random.Random(0)
+    file_path = str(tmp_path / "holders.csv")
+    with open(file_path, "w") as f:
+        for _ in range(100_000):
+            f.write(f"{random_address(rand)},{rand.randrange(10**24)}\n")
+
+    assert len(benchmark(lambda: list(holders.init_holders(file_path)))) == 100_000
+
+
+def test_generate_genesis(benchmark, tmp_path, holders_file):
+    bytecodes = {contract.key: "0x" + "60" * 12_000 for contract in genesis.GENESIS_CONTRACTS}
+    init_holders = genesis.read_init_holders(holders_file)
+    output_file = str(tmp_path / "genesis.json")
+
+    benchmark(
+        genesis.generate_genesis,
+        bytecodes,
+        os.path.join(work_dir, "genesis-template.json"),
+        output_file,
+        12216,
+        "0x1B27c1bf5Cb0Bd8B8D7D9f8BBa2BD4e5fEeE4aF8",
+        "0x" + "00" * 97,
+        init_holders,
+    )
+
+    assert os.path.getsize(output_file) > 100_000 * 40
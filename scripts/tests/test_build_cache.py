@@ -0,0 +1,96 @@
+import os
+
+from scripts.build_cache import BytecodeCache, cache_key
+
+
+def write_sources(tmp_path):
+    (tmp_path / "contracts" / "lib").mkdir(parents=True)
+    (tmp_path / "contracts" / "A.sol").write_text("contract A {}\n")
+    (tmp_path / "contracts" / "lib" / "B.sol").write_text("contract B {}\n")
+    (tmp_path / "foundry.toml").write_text("[profile.default]\n")
+
+
+def test_cache_key_sensitivity(tmp_path):
+    write_sources(tmp_path)
+    contracts_dir = str(tmp_path / "contracts")
+    settings_files = [str(tmp_path / "foundry.toml"), str(tmp_path / "package-lock.json")]
+
+    def key(compiler="forge 1"):
+        return cache_key(contracts_dir, settings_files, compiler)
+
+    before = key()
+    assert key() == before
+    assert key("forge 2") != before
+
+    (tmp_path / "contracts" / "lib" / "B.sol").write_text("contract B { uint x; }\n")
+    after_source = key()
+    assert after_source != before
+
+    (tmp_path / "foundry.toml").write_text("[profile.default]\noptimizer = true\n")
+    after_settings = key()
+    assert after_settings != after_source
+
+    # a settings file appearing changes the key as well
+    (tmp_path / "package-lock.json").write_text("{}\n")
+    assert key() != after_settings
+
+    # moving content between files is not the same tree
+    (tmp_path / "contracts" / "lib" / "B.sol").write_text("contract A {}\n")
+    (tmp_path / "contracts" / "A.sol").write_text("contract B { uint x; }\n")
+    assert key() != after_settings
+
+
+def test_cache_key_renamed_file(tmp_path):
+    write_sources(tmp_path)
+    contracts_dir = str(tmp_path / "contracts")
+
+    before = cache_key(contracts_dir, [], "forge 1")
+    os.rename(tmp_path / "contracts" / "A.sol", tmp_path / "contracts" / "C.sol")
+    assert cache_key(contracts_dir, [], "forge 1") != before
+
+
+def test_store_and_load(tmp_path):
+    cache = BytecodeCache(str(tmp_path / "cache"), 1 << 20)
+    assert cache.load("missing") is None
+
+    build = {"bytecodes": {"A": "0x00"}, "sizes": {"A": {"initcode": 1, "runtime": 1}}}
+    cache.store("key", build)
+    assert cache.load("key") == build
+    assert [file for file in os.listdir(tmp_path / "cache")] == ["key.json"]
+
+    # a corrupted entry is a miss
+    (tmp_path / "cache" / "key.json").write_text("{")
+    assert cache.load("key") is None
+
+
+def test_load_refreshes_mtime(tmp_path):
+    cache = BytecodeCache(str(tmp_path / "cache"), 1 << 20)
+    cache.store("key", {"bytecodes": {}})
+    os.utime(cache.path("key"), (1000, 1000))
+
+    cache.load("key")
+
+    assert os.stat(cache.path("key")).st_mtime > 1000
+
+
+def test_evicts_least_recently_used(tmp_path):
+    build = {"bytecodes": {"A": "0x" + "00" * 100}}
+    cache = BytecodeCache(str(tmp_path / "cache"), 1 << 20)
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.store(key, build)
+        os.utime(cache.path(key), (1000 + i, 1000 + i))
+    entry_size = os.stat(cache.path("a")).st_size
+
+    # "a" was stored first but used last
+    assert cache.load("a") == build
+    os.utime(cache.path("a"), (2000, 2000))
+
+    cache.max_size = 3 * entry_size
+    cache.store("d", build)
+
+    assert sorted(os.listdir(tmp_path / "cache")) == ["a.json", "c.json", "d.json"]
+
+    # an entry is kept when it alone fits
+    cache.max_size = entry_size
+    cache.store("e", build)
+    assert os.listdir(tmp_path / "cache") == ["e.json"]
@@ -0,0 +1,75 @@
+import json
+import os
+
+from scripts import generate, genesis
+from scripts.generate import annotate_errors, canonical_error_signature
+
+SOURCE = """contract A {
+    error Error(string reason);
+    // @notice signature: 0xdeadbeef
+    error Panic(uint256 code);
+
+    error Unknown();
+}
+"""
+
+ANNOTATED = """contract A {
+    // @notice signature: 0x08c379a0
+    error Error(string reason);
+    // @notice signature: 0x4e487b71
+    error Panic(uint256 code);
+
+    // @notice signature: 0x0cf64598
+    error Unknown();
+}
+"""
+
+
+def test_canonical_error_signature():
+    assert canonical_error_signature("Error(string reason)") == "Error(string)"
+    assert canonical_error_signature("Moved(address from, uint256 amount)") == "Moved(address,uint256)"
+    assert canonical_error_signature("Unknown()") == "Unknown()"
+
+
+def test_annotate_errors():
+    annotated = annotate_errors(SOURCE)
+
+    # the stale annotation is replaced, the missing ones inserted
+    assert annotated == ANNOTATED
+    assert annotate_errors(annotated) == annotated
+
+
+def test_generate_error_sig_index(tmp_path, monkeypatch):
+    index_path = tmp_path / ".cache" / "error_sig.json"
+    monkeypatch.setattr(generate, "work_dir", str(tmp_path))
+    monkeypatch.setattr(generate, "error_sig_index_path", str(index_path))
+    (tmp_path / "contracts" / "flattened").mkdir(parents=True)
+    (tmp_path / "contracts" / "A.sol").write_text(SOURCE)
+    (tmp_path / "contracts" / "B.sol").write_text("contract B {}\n")
+    (tmp_path / "contracts" / "flattened" / "A.sol").write_text(SOURCE)
+
+    generate.generate_error_sig(str(tmp_path / "contracts"))
+
+    assert (tmp_path / "contracts" / "A.sol").read_text() == ANNOTATED
+    # the flattened sources are generated and left alone
+    assert (tmp_path / "contracts" / "flattened" / "A.sol").read_text() == SOURCE
+    index = json.loads(index_path.read_text())
+    assert sorted(index) == [os.path.join("contracts", "A.sol"), os.path.join("contracts", "B.sol")]
+    assert index[os.path.join("contracts", "A.sol")] == genesis.file_digest(str(tmp_path / "contracts" / "A.sol"))
+
+    # a file whose digest is in the index is skipped, even if it lacks annotations
+    os.utime(tmp_path / "contracts" / "A.sol", (1000, 1000))
+    (tmp_path / "contracts" / "B.sol").write_text("contract B {\n    error Unknown();\n}\n")
+    index[os.path.join("contracts", "B.sol")] = genesis.file_digest(str(tmp_path / "contracts" / "B.sol"))
+    index_path.write_text(json.dumps(index))
+
+    generate.generate_error_sig(str(tmp_path / "contracts"))
+
+    assert os.stat(tmp_path / "contracts" / "A.sol").st_mtime == 1000
+    assert "@notice" not in (tmp_path / "contracts" / "B.sol").read_text()
+
+    # unless the index is ignored
+    generate.generate_error_sig(str(tmp_path / "contracts"), no_cache=True)
+
+    assert os.stat(tmp_path / "contracts" / "A.sol").st_mtime == 1000
+    assert "@notice" in (tmp_path / "contracts" / "B.sol").read_text()
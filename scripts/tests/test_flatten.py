@@ -0,0 +1,43 @@
+from scripts.flatten import closure_digest, import_closure
+
+
+def write_sources(tmp_path):
+    (tmp_path / "contracts" / "lib").mkdir(parents=True)
+    (tmp_path / "node_modules" / "@dep").mkdir(parents=True)
+    (tmp_path / "contracts" / "A.sol").write_text(
+        'import "./lib/B.sol";\nimport {Dep} from "@dep/Dep.sol";\nimport * as M from "@missing/M.sol";\n'
+    )
+    (tmp_path / "contracts" / "lib" / "B.sol").write_text('import "../C.sol" as C;\n')
+    (tmp_path / "contracts" / "C.sol").write_text('import "./lib/B.sol";\ncontract C {}\n')
+    (tmp_path / "node_modules" / "@dep" / "Dep.sol").write_text("contract Dep {}\n")
+    (tmp_path / "contracts" / "Unrelated.sol").write_text("contract Unrelated {}\n")
+
+
+def test_import_closure(tmp_path):
+    write_sources(tmp_path)
+
+    closure = import_closure(str(tmp_path / "contracts" / "A.sol"), [str(tmp_path / "node_modules")])
+
+    assert closure == sorted([
+        "@missing/M.sol",
+        str(tmp_path / "contracts" / "A.sol"),
+        str(tmp_path / "contracts" / "C.sol"),
+        str(tmp_path / "contracts" / "lib" / "B.sol"),
+        str(tmp_path / "node_modules" / "@dep" / "Dep.sol"),
+    ])
+
+
+def test_closure_digest_changes_with_transitive_imports(tmp_path):
+    write_sources(tmp_path)
+
+    def digest(toolchain="forge 1"):
+        file_path = str(tmp_path / "contracts" / "A.sol")
+        return closure_digest(file_path, [str(tmp_path / "node_modules")], str(tmp_path), toolchain)
+
+    before = digest()
+    (tmp_path / "contracts" / "Unrelated.sol").write_text("contract Unrelated { uint x; }\n")
+    assert digest() == before
+
+    (tmp_path / "contracts" / "C.sol").write_text('import "./lib/B.sol";\ncontract C { uint x; }\n')
+    assert digest() != before
+    assert digest("forge 2") != digest()
@@ -0,0 +1,100 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from scripts import genesis
+from scripts.generate import MAINNET, work_dir
+
+
+def committed_bytecodes():
+    with open(os.path.join(work_dir, "genesis.json"), "r") as f:
+        alloc = json.load(f)["alloc"]
+    return {contract.key: alloc[contract.address]["code"] for contract in genesis.GENESIS_CONTRACTS}
+
+
+def render_mainnet(output_file, storage=None, canonical=False):
+    with open(os.path.join(work_dir, "genesis.json"), "r") as f:
+        extra_data = json.load(f)["extraData"]
+    genesis.generate_genesis(
+        committed_bytecodes(),
+        os.path.join(work_dir, "genesis-template.json"),
+        output_file,
+        MAINNET.chain_id,
+        MAINNET.ens_registry_owner,
+        extra_data,
+        genesis.read_init_holders(os.path.join(work_dir, MAINNET.init_holders_file)),
+        storage,
+        canonical,
+    )
+
+
+def test_render_matches_committed_genesis(tmp_path):
+    render_mainnet(str(tmp_path / "genesis.json"))
+
+    with open(os.path.join(work_dir, "genesis.json"), "rb") as f:
+        assert (tmp_path / "genesis.json").read_bytes() == f.read()
+
+
+def test_render_preinit_storage(tmp_path):
+    slots = {"0x" + "00" * 32: "0x" + "00" * 31 + "01", "0x" + "00" * 31 + "01": "0x" + "00" * 31 + "2d"}
+    render_mainnet(str(tmp_path / "genesis.json"), {"stakeHub": slots, "validatorContract": {}})
+
+    alloc = json.loads((tmp_path / "genesis.json").read_text())["alloc"]
+    assert alloc["0x0000000000000000000000000000000000002002"]["storage"] == slots
+    assert "storage" not in alloc["0x0000000000000000000000000000000000001000"]
+
+
+def test_render_canonical(tmp_path):
+    render_mainnet(str(tmp_path / "genesis.json"), canonical=True)
+
+    content = (tmp_path / "genesis.json").read_text()
+    with open(os.path.join(work_dir, "genesis.json"), "r") as f:
+        committed = json.load(f)
+    committed["alloc"] = {address.lower(): account for address, account in committed["alloc"].items()}
+    assert json.loads(content) == committed
+    assert content == json.dumps(committed, sort_keys=True, separators=(",", ":"))
+
+
+def test_compress_genesis(tmp_path):
+    genesis_file = str(tmp_path / "genesis.json")
+    render_mainnet(genesis_file)
+
+    compressed_file = genesis.compress_genesis(genesis_file, "gzip")
+    first = (tmp_path / "genesis.json.gz").read_bytes()
+    genesis.compress_genesis(genesis_file, "gzip")
+
+    assert compressed_file == genesis_file + ".gz"
+    assert (tmp_path / "genesis.json.gz").read_bytes() == first
+    assert gzip.decompress(first) == (tmp_path / "genesis.json").read_bytes()
+    assert (tmp_path / "genesis.json.sha256").read_text() == (
+        f"{genesis.file_digest(genesis_file)}  genesis.json\n{genesis.file_digest(compressed_file)}  genesis.json.gz\n"
+    )
+
+    report = genesis.size_report(compressed_file)
+    assert report["document_size"] == os.path.getsize(genesis_file)
+    assert report["file_size"] == len(first)
+    alloc = json.loads((tmp_path / "genesis.json").read_text())["alloc"]
+    assert sorted(report["code_sizes"], key=lambda code_size: -code_size[1]) == report["code_sizes"]
+    assert dict(report["code_sizes"]) == {
+        address: len(account["code"]) // 2 - 1 for address, account in alloc.items() if "code" in account
+    }
+
+
+def test_read_init_holders_rejects_other_forms(tmp_path):
+    file_path = tmp_path / "init_holders.js"
+    file_path.write_text(
+        "const init_holders = [\n"
+        "  {\n     address: '0x63Ae79C826b9FD64cd5D59520987A062240240D3',\n"
+        "     balance: BigInt('1000').toString(16)\n  },\n"
+        "  {\n     address: '0x1B272dC2635CFBE67116434CdBfD7525f8F5196F',\n"
+        "     balance: '0x3e8'\n  },\n"
+        "];\n"
+    )
+    with pytest.raises(Exception, match="init_holders.js:7"):
+        genesis.read_init_holders(str(file_path))
+
+    file_path.write_text("const init_holders = [];\n")
+    with pytest.raises(Exception, match="No init holder"):
+        genesis.read_init_holders(str(file_path))
@@ -0,0 +1,98 @@
+import io
+import json
+
+import pytest
+
+from scripts import genesis_diff
+from scripts.genesis_diff import JsonStream, diff_genesis
+
+ADDRESS = "0x" + "ab" * 20
+OTHER = "0x" + "cd" * 20
+
+
+def write_genesis(path, alloc, **fields):
+    path.write_text(json.dumps(dict(fields, alloc=alloc), indent=2))
+    return str(path)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7])
+def test_stream_across_chunks(monkeypatch, chunk_size):
+    monkeypatch.setattr(genesis_diff, "CHUNK_SIZE", chunk_size)
+    document = {"chainId": 12216, "gasLimit": "0x2625a00", "alloc": {ADDRESS: {"balance": "0x10", "storage": {}}}}
+
+    stream = JsonStream(io.StringIO(json.dumps(document, indent=1)))
+    values = {}
+    for key in stream.members():
+        if key == "alloc":
+            values[key] = {address: stream.value() for address in stream.members()}
+        else:
+            values[key] = stream.value()
+
+    # 12216 is only complete once the next chunk is read
+    assert values == document
+
+
+def test_stream_empty_object_and_truncated_file(monkeypatch):
+    monkeypatch.setattr(genesis_diff, "CHUNK_SIZE", 2)
+    assert list(JsonStream(io.StringIO(" { } ")).members()) == []
+
+    stream = JsonStream(io.StringIO('{"alloc": {"a": 1'))
+    with pytest.raises(ValueError):
+        for _ in stream.members():
+            stream.value()
+
+
+def test_identical_genesis(tmp_path):
+    alloc = {ADDRESS: {"balance": "0x1", "code": "0x60"}}
+    expected = write_genesis(tmp_path / "expected.json", alloc, chainId=1)
+    actual = write_genesis(tmp_path / "actual.json", alloc, chainId=1)
+
+    assert list(diff_genesis(expected, actual)) == []
+
+
+def test_changed_accounts_and_fields(tmp_path):
+    expected = write_genesis(
+        tmp_path / "expected.json",
+        {
+            ADDRESS: {"balance": "0x1", "code": "0x60", "storage": {"0x0": "0x1"}},
+            OTHER: {"balance": "0x1"},
+            "0x" + "11" * 20: {"balance": "0x1"},
+        },
+        chainId=1,
+        extraData="0x00",
+    )
+    actual = write_genesis(
+        tmp_path / "actual.json",
+        {
+            # reordered and checksummed, which is no difference
+            "0x" + "11" * 20: {"balance": "0x1"},
+            OTHER.upper().replace("0X", "0x"): {"balance": "0x2", "storage": {}},
+            ADDRESS: {"balance": "0x1", "code": "0x61", "storage": {"0x0": "0x2"}},
+            "0x" + "22" * 20: {"balance": "0x1"},
+        },
+        chainId=2,
+        extraData="0x00",
+    )
+
+    differences = list(diff_genesis(expected, actual))
+
+    assert sorted(differences) == sorted([
+        ("field", "chainId", ["value"]),
+        ("account", "cd" * 20, ["balance", "storage"]),
+        ("account", "ab" * 20, ["code", "storage"]),
+        ("account", "22" * 20, ["unexpected"]),
+    ])
+
+
+def test_missing_accounts_and_fail_fast(tmp_path):
+    expected = write_genesis(tmp_path / "expected.json", {ADDRESS: {"balance": "0x1"}, OTHER: {"balance": "0x1"}})
+    actual = write_genesis(tmp_path / "actual.json", {})
+
+    assert list(diff_genesis(expected, actual)) == [
+        ("account", "ab" * 20, ["missing"]),
+        ("account", "cd" * 20, ["missing"]),
+    ]
+    assert list(diff_genesis(expected, actual, fail_fast=True)) == [("account", "ab" * 20, ["missing"])]
+
+    changed = write_genesis(tmp_path / "changed.json", {ADDRESS: {"balance": "0x2"}, OTHER: {"balance": "0x2"}})
+    assert list(diff_genesis(expected, changed, fail_fast=True)) == [("account", "ab" * 20, ["balance"])]
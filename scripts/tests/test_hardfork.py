@@ -0,0 +1,76 @@
+import json
+import os
+import subprocess
+
+import pytest
+
+from scripts.generate import work_dir
+from scripts.genesis import GENESIS_CONTRACTS
+from scripts.hardfork import (
+    DigestCache, code_digest, genesis_code_digests, hardfork_files, hardfork_order, latest_files
+)
+
+
+def write_hardfork(repo_dir, hardfork, network_dir, codes):
+    hardfork_dir = os.path.join(repo_dir, "core", "systemcontracts", hardfork, network_dir)
+    os.makedirs(hardfork_dir)
+    for name, code in codes.items():
+        with open(os.path.join(hardfork_dir, name), "w") as f:
+            f.write(code)
+
+
+def test_genesis_code_digests():
+    with open(os.path.join(work_dir, "genesis.json"), "r") as f:
+        alloc = json.load(f)["alloc"]
+
+    digests = genesis_code_digests(os.path.join(work_dir, "genesis.json"))
+
+    for contract in GENESIS_CONTRACTS:
+        if contract.hardfork_name:
+            assert digests[contract.hardfork_name] == code_digest(alloc[contract.address]["code"])
+
+
+def test_hardfork_files_and_digest_cache(tmp_path):
+    write_hardfork(str(tmp_path), "a", "mainnet", {"GovHubContract": "60806040\n", "README": "-"})
+    write_hardfork(str(tmp_path), "b", "mainnet", {"GovHubContract": "0x60806041"})
+    write_hardfork(str(tmp_path), "b", "chapel", {"GovHubContract": "60806041"})
+
+    files = list(hardfork_files(str(tmp_path), [], ["mainnet"]))
+    assert [(hardfork, name) for hardfork, _, name, _ in files] == [("a", "GovHubContract"), ("b", "GovHubContract")]
+
+    cache = DigestCache(str(tmp_path / "cache" / "digests.json"))
+    digests, hashed = cache.digests([file_path for _, _, _, file_path in files])
+    assert hashed == 2
+    assert list(digests.values()) == [code_digest("0x60806040"), code_digest("60806041")]
+    cache.save()
+
+    digests, hashed = DigestCache(str(tmp_path / "cache" / "digests.json")).digests(list(digests))
+    assert hashed == 0
+
+
+def test_latest_hardfork_files(tmp_path):
+    repo_dir = str(tmp_path)
+
+    def git(*args):
+        subprocess.run(["git", *args], cwd=repo_dir, check=True, capture_output=True)
+
+    git("init", "-q")
+    # added after "b", though sorted before it
+    for hardfork in ["b", "a"]:
+        write_hardfork(repo_dir, hardfork, "mainnet", {"GovHubContract": hardfork})
+        git("add", ".")
+        git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", hardfork)
+    write_hardfork(repo_dir, "c", "chapel", {"GovHubContract": "c"})
+    git("add", ".")
+    git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "c")
+
+    assert hardfork_order(repo_dir) == ["b", "a", "c"]
+
+    files = list(hardfork_files(repo_dir, [], ["mainnet", "chapel"]))
+    root_dir = os.path.join(repo_dir, "core", "systemcontracts")
+    assert latest_files(files, hardfork_order(repo_dir)) == {
+        ("mainnet", "GovHubContract"): os.path.join(root_dir, "a", "mainnet", "GovHubContract"),
+        ("chapel", "GovHubContract"): os.path.join(root_dir, "c", "chapel", "GovHubContract"),
+    }
+    with pytest.raises(Exception, match="hardfork a"):
+        latest_files(files, ["b", "c"])
@@ -0,0 +1,68 @@
+import os
+import random
+
+import pytest
+
+from scripts import genesis
+from scripts.generate import work_dir
+from scripts.holders import HolderStats, init_holders, merge_holders, read_holders_file
+
+
+def random_rows(n):
+    rand = random.Random(n)
+    addresses = ["0x" + rand.randbytes(20).hex() for _ in range(n // 2)]
+    return [(rand.choice(addresses), rand.randrange(10**24)) for _ in range(n)]
+
+
+@pytest.mark.parametrize("run_size", [1, 7, 1000])
+def test_merge_holders_sums_duplicates(run_size):
+    rows = random_rows(200)
+    expected = {}
+    for address, balance in rows:
+        expected[address] = expected.get(address, 0) + balance
+
+    assert list(merge_holders(rows, run_size=run_size)) == sorted(expected.items())
+
+
+def test_read_holders_files(tmp_path):
+    address = "0x" + "ab" * 20
+    upper_address = "0x" + address[2:].upper()
+    (tmp_path / "holders.csv").write_text(f"address,balance\n{upper_address},10\n{address},0x10\n")
+    (tmp_path / "holders.jsonl").write_text(
+        f'{{"address": "{address}", "balance": 10}}\n\n{{"address": "{address}", "balance": "0x10"}}\n'
+    )
+
+    for file in ("holders.csv", "holders.jsonl"):
+        assert list(read_holders_file(str(tmp_path / file))) == [(address, 10), (address, 16)]
+
+
+def test_init_holders_stats(tmp_path):
+    file_path = tmp_path / "holders.csv"
+    file_path.write_text("".join(f"{address},{balance}\n" for address, balance in random_rows(100)))
+
+    stats = HolderStats()
+    holders = list(stats.count(init_holders(str(file_path))))
+
+    assert stats.accounts == len(holders) == len({address for address, _ in random_rows(100)})
+    assert stats.total_supply == sum(balance for _, balance in random_rows(100))
+
+
+def test_init_holders_rejects_invalid_rows(tmp_path):
+    file_path = tmp_path / "holders.csv"
+    file_path.write_text(f"0x{'ab' * 20},-1\n")
+    with pytest.raises(Exception, match="holders.csv:1"):
+        list(init_holders(str(file_path)))
+
+    system_contract = "0x0000000000000000000000000000000000001000"
+    file_path.write_text(f"{system_contract},1\n")
+    with pytest.raises(Exception, match="account of the genesis template"):
+        list(init_holders(str(file_path), [system_contract]))
+
+
+def test_template_addresses():
+    addresses = genesis.template_addresses(os.path.join(work_dir, "genesis-template.json"))
+
+    assert {contract.address for contract in genesis.GENESIS_CONTRACTS} < set(addresses)
+    # the coinbase and multicall
+    assert "0xffffFFFfFFffffffffffffffFfFFFfffFFFfFFfE" in addresses
+    assert "0xcA11bde05977b3631167028862bE2a173976CA11" in addresses
@@ -0,0 +1,115 @@
+import os
+
+import pytest
+
+from scripts import generate
+from scripts.generate import ContractPatch
+
+SOURCE = """contract A {
+    uint256 public constant LIMIT = 10;
+    uint256 public constant PERIOD = 1 days;
+
+    function f() external {}
+}
+"""
+
+
+def test_edits_apply_in_order():
+    patch = ContractPatch("A.sol")
+    patch.replace_parameter("LIMIT", "20")
+    patch.insert("function f", "    uint256 public first;")
+    # inserted before the same line, so after the first insertion
+    patch.insert("function f", "    uint256 public second;")
+    patch.replace("first", "renamed")
+
+    assert patch.apply(SOURCE) == """contract A {
+    uint256 public constant LIMIT = 20;
+    uint256 public constant PERIOD = 1 days;
+
+    uint256 public renamed;
+    uint256 public second;
+    function f() external {}
+}
+"""
+
+
+def test_insert_before_first_match():
+    patch = ContractPatch("A.sol")
+    patch.insert("uint256 public constant", "    // constants")
+
+    assert patch.apply(SOURCE).splitlines()[1:4] == [
+        "    // constants",
+        "    uint256 public constant LIMIT = 10;",
+        "    uint256 public constant PERIOD = 1 days;",
+    ]
+
+
+def test_replace_count():
+    patch = ContractPatch("A.sol")
+    patch.replace("uint256", "uint128")
+    patch.replace("constant", "immutable", count=2)
+
+    patched = patch.apply(SOURCE)
+    assert (patched.count("uint128"), patched.count("uint256")) == (1, 1)
+    assert patched.count("immutable") == 2
+
+
+@pytest.mark.parametrize(
+    "edit",
+    [
+        lambda patch: patch.insert("function g", "    uint256 public x;"),
+        lambda patch: patch.replace("MISSING", "FOUND"),
+        lambda patch: patch.replace_parameter("EPOCH", "200"),
+    ],
+)
+def test_missing_pattern(edit):
+    patch = ContractPatch("A.sol")
+    edit(patch)
+
+    with pytest.raises(Exception, match="not found"):
+        patch.apply(SOURCE)
+
+
+def write_contracts(tmp_path):
+    (tmp_path / "contracts" / "lib").mkdir(parents=True)
+    (tmp_path / "contracts" / "A.sol").write_text(SOURCE)
+    (tmp_path / "contracts" / "lib" / "B.sol").write_text("contract B {}\n")
+    (tmp_path / "contracts" / "Old.sol.bak").write_text("contract Old {}\n")
+
+
+def test_stage_contracts(tmp_path, monkeypatch):
+    monkeypatch.setattr(generate, "work_dir", str(tmp_path))
+    write_contracts(tmp_path)
+    stage_dir = tmp_path / ".staging" / "dev"
+    (stage_dir / "contracts").mkdir(parents=True)
+    (stage_dir / "contracts" / "Removed.sol").write_text("contract Removed {}\n")
+
+    first, second = ContractPatch("A.sol"), ContractPatch("A.sol")
+    first.replace_parameter("LIMIT", "20")
+    second.replace_parameter("LIMIT", "30")
+    generate.stage_contracts(str(stage_dir), [first, second])
+
+    # the patches of a contract apply in order, the sources are left alone and stale files removed
+    assert "LIMIT = 30;" in (stage_dir / "contracts" / "A.sol").read_text()
+    assert (tmp_path / "contracts" / "A.sol").read_text() == SOURCE
+    assert (stage_dir / "contracts" / "lib" / "B.sol").read_text() == "contract B {}\n"
+    assert sorted(str(path.relative_to(stage_dir)) for path in stage_dir.rglob("*.sol")) == [
+        os.path.join("contracts", "A.sol"),
+        os.path.join("contracts", "lib", "B.sol"),
+    ]
+
+    # unchanged staged files are not written again
+    os.utime(stage_dir / "contracts" / "A.sol", (1000, 1000))
+    os.utime(stage_dir / "contracts" / "lib" / "B.sol", (1000, 1000))
+    generate.stage_contracts(str(stage_dir), [first, second])
+
+    assert os.stat(stage_dir / "contracts" / "A.sol").st_mtime == 1000
+    assert os.stat(stage_dir / "contracts" / "lib" / "B.sol").st_mtime == 1000
+
+
+def test_stage_contracts_missing_contract(tmp_path, monkeypatch):
+    monkeypatch.setattr(generate, "work_dir", str(tmp_path))
+    write_contracts(tmp_path)
+
+    with pytest.raises(Exception, match="Missing.sol not found"):
+        generate.stage_contracts(str(tmp_path / ".staging" / "dev"), [ContractPatch("Missing.sol")])
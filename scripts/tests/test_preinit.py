@@ -0,0 +1,161 @@
+import contextlib
+import json
+
+import pytest
+
+from scripts import preinit
+from scripts.genesis import GENESIS_CONTRACTS
+
+ADDRESSES = {contract.key: contract.address.lower() for contract in GENESIS_CONTRACTS}
+
+SLOT_0 = "0x" + "00" * 32
+SLOT_1 = "0x" + "00" * 31 + "01"
+ONE = "0x" + "00" * 31 + "01"
+
+
+def render(output_file, storage):
+    with open(output_file, "w") as f:
+        json.dump(storage, f)
+
+
+def mock_nodes(monkeypatch, initialize, preinitialized=lambda state: state):
+    """
+    Nodes holding the storage of their genesis, `initialize(state)` standing for the initializers and
+    `preinitialized(state)` for what the second node holds.
+    """
+    nodes = []
+
+    @contextlib.contextmanager
+    def anvil(genesis_file):
+        with open(genesis_file, "r") as f:
+            storage = json.load(f)
+        state = {address: {} for address in ADDRESSES.values()}
+        state.update({ADDRESSES[key]: dict(slots) for key, slots in storage.items()})
+        nodes.append(state if not storage else preinitialized(state))
+        yield nodes[-1]
+
+    monkeypatch.setattr(preinit, "anvil", anvil)
+    monkeypatch.setattr(preinit, "dump_storage", lambda state: {a: dict(slots) for a, slots in state.items()})
+    monkeypatch.setattr(preinit, "call_initializers", initialize)
+    monkeypatch.setattr(preinit, "check_initialized", lambda state: None)
+    return nodes
+
+
+def test_initialized_storage_diffs_slots(monkeypatch):
+    def initialize(state):
+        state[ADDRESSES["stakeHub"]].update({SLOT_1: ONE, SLOT_0: ONE})
+        state[ADDRESSES["governor"]][SLOT_0] = ONE
+
+    nodes = mock_nodes(monkeypatch, initialize)
+
+    storage = preinit.initialized_storage(render)
+
+    assert storage == {"stakeHub": {SLOT_0: ONE, SLOT_1: ONE}, "governor": {SLOT_0: ONE}}
+    assert list(storage["stakeHub"]) == [SLOT_0, SLOT_1]
+    # the capture, the reference run and the pre-initialized genesis
+    assert len(nodes) == 3
+
+
+def test_initialized_storage_rejects_other_accounts(monkeypatch):
+    def initialize(state):
+        state["0x" + "ab" * 20] = {SLOT_0: ONE}
+
+    mock_nodes(monkeypatch, initialize)
+
+    with pytest.raises(Exception, match="which the genesis cannot hold"):
+        preinit.initialized_storage(render)
+
+
+def test_initialized_storage_checks_reference_run(monkeypatch):
+    runs = []
+
+    def initialize(state):
+        # e.g. the time block 1 is mined at
+        runs.append(None)
+        state[ADDRESSES["stakeHub"]][SLOT_0] = "0x" + f"{len(runs):064x}"
+
+    mock_nodes(monkeypatch, initialize)
+
+    with pytest.raises(Exception, match="storage of stakeHub set in block 1 differs"):
+        preinit.initialized_storage(render)
+
+
+def test_initialized_storage_checks_second_node(monkeypatch):
+    def initialize(state):
+        state[ADDRESSES["stakeHub"]][SLOT_0] = ONE
+
+    def preinitialized(state):
+        state[ADDRESSES["stakeHub"]] = {}
+        return state
+
+    mock_nodes(monkeypatch, initialize, preinitialized)
+
+    with pytest.raises(Exception, match="storage of stakeHub differs"):
+        preinit.initialized_storage(render)
+
+
+def test_initializer_calls():
+    reward = next(initializer for initializer in preinit.INITIALIZERS if initializer.key == "systemRewardContract")
+    call = preinit.initializer_call(reward)
+
+    assert call["from"].lower() == ADDRESSES["slashContract"]
+    assert call["to"].lower() == ADDRESSES["systemRewardContract"]
+    # claimRewards(address,uint256) of nothing to the block producer
+    assert len(call["data"]) == 4 + 64
+    assert call["data"][-32:] == bytes(32)
+
+
+class FakeNode:
+    """
+    A node answering the rpc calls of `call_initializers`, whose pending transactions are all mined by `evm_mine` or
+    each in its own block with automine.
+    """
+
+    def __init__(self, automine_honored=True):
+        self.automine = True
+        self.automine_honored = automine_honored
+        self.block_number = 0
+        self.pending = []
+        self.receipts = {}
+        self.calls = []
+        self.provider = self
+        self.eth = self
+
+    def make_request(self, method, params):
+        self.calls.append(method)
+        if method == "evm_setAutomine" and self.automine_honored:
+            self.automine = params[0]
+        elif method == "evm_mine":
+            self.mine()
+        return {"result": None}
+
+    def mine(self):
+        self.block_number += 1
+        for tx_hash in self.pending:
+            self.receipts[tx_hash] = {"blockNumber": self.block_number, "status": 1}
+        self.pending = []
+
+    def send_transaction(self, tx):
+        self.pending.append(len(self.receipts) + len(self.pending))
+        tx_hash = self.pending[-1]
+        if self.automine:
+            self.mine()
+        return tx_hash
+
+    def wait_for_transaction_receipt(self, tx_hash):
+        return self.receipts[tx_hash]
+
+
+def test_call_initializers_in_block_1():
+    node = FakeNode()
+
+    preinit.call_initializers(node)
+
+    assert node.block_number == 1
+    assert len(node.receipts) == len(preinit.INITIALIZERS)
+    assert node.calls.index("evm_setAutomine") < node.calls.index("evm_mine")
+
+
+def test_call_initializers_rejects_later_blocks():
+    with pytest.raises(Exception, match="ran in block 2"):
+        preinit.call_initializers(FakeNode(automine_honored=False))
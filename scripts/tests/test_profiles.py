@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+from scripts.generate import DEV, MAINNET, load_profile, staging_dir
+
+
+def test_profile_inherits_from_mainnet(tmp_path):
+    (tmp_path / "devnet.toml").write_text('chain_id = 1000\nmax_elected_validators = 21\n')
+
+    config = load_profile(str(tmp_path / "devnet.toml"))
+
+    assert config.network == "devnet"
+    assert config.patch_network == "mainnet"
+    assert config.chain_id == 1000
+    assert config.max_elected_validators == "21"
+    assert config.genesis_file == os.path.join(staging_dir, "devnet", "genesis.json")
+    assert config.init_validator_set_bytes == MAINNET.init_validator_set_bytes
+
+
+def test_profile_extends_profile(tmp_path):
+    (tmp_path / "base.toml").write_text('extends = "dev"\nunbond_period = "1 days"\n')
+    (tmp_path / "child.toml").write_text('extends = "base.toml"\nnetwork = "child-net"\n')
+
+    config = load_profile(str(tmp_path / "child.toml"))
+
+    assert config.network == "child-net"
+    assert config.patch_network == "dev"
+    assert config.chain_id == DEV.chain_id
+    assert config.unbond_period == "1 days"
+
+
+def test_profile_with_own_validators(tmp_path):
+    (tmp_path / "devnet.toml").write_text('validators_file = "./devnet-validators.conf"\n')
+
+    assert load_profile(str(tmp_path / "devnet.toml")).init_validator_set_bytes == ""
+
+
+def test_profile_files_relative_to_profile(tmp_path, monkeypatch):
+    (tmp_path / "profiles").mkdir()
+    (tmp_path / "profiles" / "base.toml").write_text('validators_file = "validators.conf"\n')
+    (tmp_path / "profiles" / "child.toml").write_text(
+        'extends = "base.toml"\ninit_holders_file = "../holders.csv"\ngenesis_file = "out/genesis.json"\n'
+    )
+    monkeypatch.chdir(tmp_path)
+
+    config = load_profile(os.path.join("profiles", "child.toml"))
+
+    assert config.validators_file == str(tmp_path / "profiles" / "validators.conf")
+    assert config.init_holders_file == str(tmp_path / "holders.csv")
+    assert config.genesis_file == str(tmp_path / "profiles" / "out" / "genesis.json")
+    # the files of the network it extends are left relative to the repository
+    assert load_profile(str(tmp_path / "profiles" / "base.toml")).init_holders_file == MAINNET.init_holders_file
+
+
+def test_invalid_profiles(tmp_path):
+    (tmp_path / "unknown.toml").write_text('chain_idd = 1000\n')
+    with pytest.raises(Exception, match="chain_idd"):
+        load_profile(str(tmp_path / "unknown.toml"))
+
+    (tmp_path / "loop.toml").write_text('extends = "loop.toml"\n')
+    with pytest.raises(Exception, match="extends itself"):
+        load_profile(str(tmp_path / "loop.toml"))
@@ -0,0 +1,48 @@
+from scripts import sizes
+
+
+def test_read_gas_snapshot(tmp_path):
+    (tmp_path / ".gas-snapshot").write_text(
+        "StakeHubTest:testCreateValidator() (gas: 512345)\n"
+        "StakeHubTest:testFuzzDelegate(uint256) (runs: 256, μ: 80000, ~: 79000)\n"
+        "InvariantTest:invariant_supply() (runs: 256, calls: 3840, reverts: 0)\n",
+        encoding="utf-8",
+    )
+
+    assert sizes.read_gas_snapshot(str(tmp_path / ".gas-snapshot")) == {
+        "StakeHubTest:testCreateValidator()": 512345,
+        "StakeHubTest:testFuzzDelegate(uint256)": 80000,
+    }
+
+
+def test_compare_with_baseline():
+    baseline = {
+        "sizes": {
+            "mainnet": {"StakeHub": {"initcode": 1000, "runtime": 900}, "GovHub": {"initcode": 100, "runtime": 90}},
+            "testnet": {"StakeHub": {"initcode": 1, "runtime": 1}},
+        },
+        "gas": {"T:testA()": 100, "T:testB()": 100},
+    }
+    report = {
+        "sizes": {
+            "mainnet": {"StakeHub": {"initcode": 1005, "runtime": 950}, "GovHub": {"initcode": 100, "runtime": 90}},
+        },
+        "gas": {"T:testA()": 100, "T:testC()": 200},
+    }
+
+    deltas = sizes.compare(baseline, report)
+
+    assert deltas == [
+        sizes.Delta("StakeHub initcode (mainnet)", 1000, 1005),
+        sizes.Delta("StakeHub runtime (mainnet)", 900, 950),
+        sizes.Delta("gas T:testC()", None, 200),
+        sizes.Delta("gas T:testB()", 100, None),
+    ]
+    assert [delta.name for delta in deltas if sizes.exceeds(delta, 1.0)] == ["StakeHub runtime (mainnet)"]
+    assert [delta.name for delta in deltas if sizes.exceeds(delta, 10.0)] == []
+    # without a gas snapshot, the gas of the baseline is left alone
+    assert sizes.compare(baseline, {"sizes": report["sizes"]}) == deltas[:2]
+
+    merged = sizes.merge(baseline, {"sizes": report["sizes"]})
+    assert merged["sizes"] == dict(report["sizes"], testnet=baseline["sizes"]["testnet"])
+    assert merged["gas"] == baseline["gas"]
@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from scripts.generate import work_dir
+
+# the time of all the imports for the commands called by automation, in seconds
+STARTUP_BUDGET = 0.25
+# the wall time of the whole process, the interpreter start included
+WALL_TIME_BUDGET = 0.5
+
+# the modules only the commands that need them import
+HEAVY_MODULES = [
+    "web3", "eth_account", "aiohttp", "jinja2", "eth_hash", "scripts.abi_index", "scripts.build_cache",
+    "scripts.flatten", "scripts.genesis_diff", "scripts.hardfork", "scripts.holders", "scripts.preinit",
+    "scripts.sizes", "scripts.validator_set"
+]
+
+
+def cold_start(tmp_path, *args):
+    """
+    Run the cli in a new interpreter from an empty directory, returning the import time of every module imported,
+    in seconds, as reported by `-X importtime`, the time of all the imports and the wall time of a run without
+    `-X importtime`.
+    """
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "scripts.generate", *args],
+        cwd=tmp_path,
+        env=dict(os.environ, PYTHONPATH=work_dir),
+        capture_output=True,
+        check=True,
+    )
+    wall_time = time.perf_counter() - start
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "scripts.generate", *args],
+        cwd=tmp_path,
+        env=dict(os.environ, PYTHONPATH=work_dir),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    total = 0
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "cumulative" not in line:
+            _, cumulative, module = line.split("|")
+            modules[module.strip()] = int(cumulative) / 1e6
+            # the modules imported by others are part of their cumulative time
+            if not module.startswith("  "):
+                total += int(cumulative) / 1e6
+    return modules, total, wall_time
+
+
+@pytest.mark.parametrize("args", [["--help"], ["recover"]])
+def test_startup(tmp_path, args):
+    (tmp_path / "contracts").mkdir()
+    modules, total, wall_time = cold_start(tmp_path, *args)
+
+    slowest = sorted(modules.items(), key=lambda module: -module[1])[:10]
+    report = "\n".join(f"{module}: {seconds * 1000:.1f}ms" for module, seconds in slowest)
+    assert not [module for module in HEAVY_MODULES if module in modules], report
+    assert total < STARTUP_BUDGET, f"{total * 1000:.1f}ms of imports\n{report}"
+    assert wall_time < WALL_TIME_BUDGET, f"{wall_time * 1000:.1f}ms to run\n{report}"
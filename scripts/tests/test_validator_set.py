@@ -0,0 +1,164 @@
+import json
+import os
+import random
+import shutil
+import subprocess
+
+import jinja2
+import pytest
+
+from scripts.generate import MAINNET, TESTNET, work_dir
+from scripts.validator_set import (
+    InvalidValidators, checksum_address, compile_validators, encode_validator_set, extra_data, int_to_bytes,
+    parse_validators, read_compiled_validators
+)
+
+
+def encode(item):
+    # generic RLP encoding of bytes, non-negative ints and (nested) lists of them, to check the single pass encoder
+    if isinstance(item, int):
+        item = int_to_bytes(item)
+    if isinstance(item, bytes):
+        if len(item) == 1 and item[0] < 0x80:
+            return item
+        return encode_header(len(item), 0x80) + item
+
+    payload = b"".join(encode(i) for i in item)
+    return encode_header(len(payload), 0xc0) + payload
+
+
+def encode_header(length, short_prefix):
+    if length < 56:
+        return bytes([short_prefix + length])
+    length_bytes = int_to_bytes(length)
+    return bytes([short_prefix + 55 + len(length_bytes)]) + length_bytes
+
+
+def decode(data):
+    # just enough RLP decoding to round-trip the hardcoded validator set bytes
+    def decode_at(offset):
+        prefix = data[offset]
+        if prefix < 0x80:
+            return data[offset:offset + 1], offset + 1
+        if prefix < 0xc0:
+            short, start = prefix < 0xb8, offset + 1
+        else:
+            short, start = prefix < 0xf8, offset + 1
+        if short:
+            length = prefix - (0x80 if prefix < 0xc0 else 0xc0)
+        else:
+            length_size = prefix - (0xb7 if prefix < 0xc0 else 0xf7)
+            length = int.from_bytes(data[start:start + length_size], "big")
+            start += length_size
+        end = start + length
+        if prefix < 0xc0:
+            return data[start:end], end
+
+        items = []
+        while start < end:
+            item, start = decode_at(start)
+            items.append(item)
+        return items, end
+
+    return decode_at(0)[0]
+
+
+def random_validators(n):
+    rand = random.Random(n)
+    return [
+        {
+            "consensusAddr": "0x" + rand.randbytes(20).hex(),
+            "feeAddr": "0x" + rand.randbytes(20).hex(),
+            "l2pFeeAddr": "0x" + rand.randbytes(20).hex(),
+            "votingPower": str(rand.randrange(2**40)),
+            "bLSPublicKey": "0x" + rand.randbytes(48).hex(),
+        } for _ in range(n)
+    ]
+
+
+def test_mainnet_validator_set_bytes():
+    validators = list(parse_validators(os.path.join(work_dir, "validators.conf")))
+
+    assert encode_validator_set(validators).hex() == MAINNET.init_validator_set_bytes
+
+
+def test_testnet_validator_set_bytes():
+    data = bytes.fromhex(TESTNET.init_validator_set_bytes)
+
+    assert encode(decode(data)) == data
+
+
+def test_mainnet_extra_data():
+    validators = list(parse_validators(os.path.join(work_dir, "validators.conf")))
+    with open(os.path.join(work_dir, "genesis.json"), "r") as f:
+        genesis = json.load(f)
+
+    assert "0x" + extra_data(validators).hex() == genesis["extraData"]
+
+
+@pytest.mark.parametrize("n", [0, 1, 3, 1000])
+def test_validator_set_matches_generic_encoder(n):
+    validators = random_validators(n)
+    fields = ("consensusAddr", "l2pFeeAddr", "feeAddr", "votingPower", "bLSPublicKey")
+    items = [[int(v[f]) if f == "votingPower" else bytes.fromhex(v[f][2:]) for f in fields] for v in validators]
+
+    assert encode_validator_set(validators) == encode([0, items])
+
+
+@pytest.mark.skipif(
+    shutil.which("node") is None or not os.path.isdir(os.path.join(work_dir, "node_modules", "rlp")),
+    reason="requires node and the npm dependencies"
+)
+@pytest.mark.parametrize("n", [3, 1000])
+def test_validator_set_matches_js_encoder(tmp_path, n):
+    validators = random_validators(n)
+    with open(os.path.join(work_dir, "scripts", "validators.template"), "r") as f:
+        template = jinja2.Environment(autoescape=True).from_string(f.read())
+    (tmp_path / "validators.js").write_text(template.render(validators=validators))
+
+    result = subprocess.run(
+        [
+            "node", "-e",
+            "const v = require(process.argv[1]); console.log(v.validatorSetBytes);"
+            "console.log(Buffer.from(v.extraValidatorBytes).toString('hex'));",
+            str(tmp_path / "validators.js")
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=work_dir,
+        env=dict(os.environ, NODE_PATH=os.path.join(work_dir, "node_modules"))
+    )
+    validator_set_bytes, extra_validator_bytes = result.stdout.split()
+
+    assert validator_set_bytes == "0x" + encode_validator_set(validators).hex()
+    assert extra_validator_bytes == extra_data(validators).hex()
+
+
+def test_parse_validators_reports_every_invalid_row(tmp_path):
+    validators = random_validators(3)
+    rows = [",".join(v.values()) for v in validators]
+    rows.append(rows[0])
+    mixed_case = checksum_address(validators[1]["feeAddr"][2:])
+    rows.append(rows[1].replace(validators[1]["feeAddr"], mixed_case[:-1] + mixed_case[-1].swapcase()))
+    rows.append(rows[2].replace(validators[2]["votingPower"], "0").replace(validators[2]["bLSPublicKey"], "0x00"))
+    rows.append("0x00,0x01")
+    file_path = tmp_path / "validators.conf"
+    file_path.write_text("\n".join(rows) + "\n")
+
+    with pytest.raises(InvalidValidators) as e:
+        list(parse_validators(str(file_path)))
+
+    assert [line for line, _ in e.value.errors] == [4, 5, 5, 6, 6, 6, 7]
+    assert "duplicate of line 1" in e.value.errors[0][1]
+    assert "checksum" in e.value.errors[1][1]
+
+
+def test_compiled_validators_round_trip(tmp_path):
+    validators = random_validators(100)
+    file_path = tmp_path / "validators.conf"
+    file_path.write_text("".join(",".join(v.values()) + "\n" for v in validators))
+    output_file = str(tmp_path / "validators.bin")
+
+    assert compile_validators(str(file_path), output_file) == 100
+    assert list(read_compiled_validators(output_file)) == validators
@@ -0,0 +1,56 @@
+import contextlib
+import json
+import time
+
+
+def io_counters():
+    # the bytes read and written by this process so far, only available on linux
+    try:
+        with open("/proc/self/io", "r") as f:
+            counters = dict(line.split(": ") for line in f.read().splitlines())
+        return int(counters["rchar"]), int(counters["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+class Timings:
+    """
+    The spans of the generation stages. Each span records its wall time, which includes the subprocesses it waits for,
+    and the bytes read and written by the generator while it was open.
+    """
+
+    def __init__(self):
+        self.spans = []
+
+    @contextlib.contextmanager
+    def span(self, stage, **attrs):
+        record = {"stage": stage, **attrs}
+        start_io = io_counters()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["wall_time"] = round(time.perf_counter() - start, 6)
+            end_io = io_counters()
+            if start_io is not None and end_io is not None:
+                record["bytes_read"] = end_io[0] - start_io[0]
+                record["bytes_written"] = end_io[1] - start_io[1]
+            self.spans.append(record)
+
+    def pop(self):
+        spans, self.spans = self.spans, []
+        return spans
+
+    def extend(self, spans):
+        self.spans.extend(spans)
+
+    def dump(self, output_file):
+        content = json.dumps({"spans": self.spans}, indent=2)
+        if output_file == "-":
+            print(content)
+        else:
+            with open(output_file, "w") as f:
+                f.write(content + "\n")
+
+
+timings = Timings()
@@ -0,0 +1,287 @@
+import hashlib
+import os
+import struct
+
+from eth_hash.auto import keccak
+
+from scripts.genesis import replace_file
+
+EXTRA_VANITY_LENGTH = 32
+EXTRA_SEAL_LENGTH = 65
+
+ADDRESS_FIELDS = ("consensusAddr", "feeAddr", "l2pFeeAddr")
+BLS_PUBLIC_KEY_LENGTH = 48
+# votingPower is an uint64 of the validator set contract
+MAX_VOTING_POWER = 2**64 - 1
+
+# the compiled validators file: a header with the digest of the source file and the number of validators, then one
+# fixed size record per validator
+COMPILED_MAGIC = b"L2PV"
+COMPILED_HEADER = struct.Struct(">4s32sI")
+COMPILED_RECORD = struct.Struct(">20s20s20sQ48s")
+
+
+class InvalidValidators(Exception):
+    """
+    Every invalid row of a validators file, as (line number, message).
+    """
+
+    def __init__(self, file_path, errors):
+        self.file_path = file_path
+        self.errors = errors
+        super().__init__(
+            f"{len(errors)} error(s) in {file_path}:\n" + "\n".join(f"  line {n}: {e}" for n, e in errors)
+        )
+
+
+def checksum_address(address):
+    # EIP-55 mixed case checksum encoding
+    address = address.lower()
+    digest = keccak(address.encode()).hex()
+    return "0x" + "".join(c.upper() if int(d, 16) >= 8 else c for c, d in zip(address, digest))
+
+
+def check_address(value):
+    if not value.startswith("0x") or len(value) != 42:
+        return "is not a 0x prefixed 20 bytes address"
+    try:
+        bytes.fromhex(value[2:])
+    except ValueError:
+        return "is not hex"
+    # all lower or upper case addresses carry no checksum
+    body = value[2:]
+    if body != body.lower() and body != body.upper() and value != checksum_address(body):
+        return "has an invalid checksum"
+    return None
+
+
+def check_validator(vs):
+    errors = []
+    for field, value in zip(ADDRESS_FIELDS, vs):
+        error = check_address(value)
+        if error:
+            errors.append(f"{field} {value} {error}")
+
+    try:
+        voting_power = int(vs[3], 0)
+        if not 0 < voting_power <= MAX_VOTING_POWER:
+            errors.append(f"votingPower {vs[3]} is out of range (0, {MAX_VOTING_POWER}]")
+    except ValueError:
+        errors.append(f"votingPower {vs[3]} is not an integer")
+
+    bls_key = vs[4][2:] if vs[4].startswith("0x") else vs[4]
+    try:
+        if len(bytes.fromhex(bls_key)) != BLS_PUBLIC_KEY_LENGTH:
+            errors.append(f"bLSPublicKey is not {BLS_PUBLIC_KEY_LENGTH} bytes")
+    except ValueError:
+        errors.append("bLSPublicKey is not hex")
+
+    return errors
+
+
+def parse_validators(file_path):
+    """
+    Validate a validators file row by row, yielding every validator as a dict of its fields by name. Rather than
+    stopping at the first invalid row it goes on to the end of the file and then raises `InvalidValidators` with all of
+    them. Only the consensus addresses seen so far are kept, to tell duplicates.
+    """
+    errors = []
+    consensus_addrs = {}
+
+    with open(file_path, "r") as file:
+        for line_number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+
+            vs = [v.strip() for v in line.strip().split(",")]
+            if len(vs) != 5:
+                errors.append((line_number, f"expected 5 fields, got {len(vs)}"))
+                continue
+
+            row_errors = check_validator(vs)
+            if check_address(vs[0]) is None:
+                consensus_addr = bytes.fromhex(vs[0][2:])
+                if consensus_addr in consensus_addrs:
+                    row_errors.append(
+                        f"consensusAddr {vs[0]} is a duplicate of line {consensus_addrs[consensus_addr]}"
+                    )
+                else:
+                    consensus_addrs[consensus_addr] = line_number
+
+            if row_errors:
+                errors.extend((line_number, error) for error in row_errors)
+                continue
+
+            yield {
+                "consensusAddr": vs[0],
+                "feeAddr": vs[1],
+                "l2pFeeAddr": vs[2],
+                "votingPower": vs[3],
+                "bLSPublicKey": vs[4],
+            }
+
+    if errors:
+        raise InvalidValidators(file_path, errors)
+
+
+def source_digest(file_path):
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            h.update(chunk)
+    return h.digest()
+
+
+def compile_validators(file_path, output_file):
+    """
+    Validate a validators file and write it as fixed size binary records into `output_file`, streaming from one to the
+    other. The output is replaced only once the whole file turned out to be valid. Returns the number of validators.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+    digest = source_digest(file_path)
+    count = 0
+
+    def write(f):
+        nonlocal count
+        f.write(COMPILED_HEADER.pack(COMPILED_MAGIC, digest, 0))
+        for v in parse_validators(file_path):
+            f.write(
+                COMPILED_RECORD.pack(
+                    hex_to_bytes(v["consensusAddr"]),
+                    hex_to_bytes(v["feeAddr"]),
+                    hex_to_bytes(v["l2pFeeAddr"]),
+                    int(v["votingPower"], 0),
+                    hex_to_bytes(v["bLSPublicKey"]),
+                )
+            )
+            count += 1
+        f.seek(0)
+        f.write(COMPILED_HEADER.pack(COMPILED_MAGIC, digest, count))
+
+    replace_file(output_file, write)
+    return count
+
+
+def compiled_digest(output_file):
+    # the digest of the source of a compiled validators file, None when it is missing or not one
+    try:
+        with open(output_file, "rb") as f:
+            magic, digest, _ = COMPILED_HEADER.unpack(f.read(COMPILED_HEADER.size))
+    except (OSError, struct.error):
+        return None
+    return digest if magic == COMPILED_MAGIC else None
+
+
+def read_compiled_validators(output_file):
+    """
+    Iterate the validators of a compiled validators file, in the form of `parse_validators`.
+    """
+    with open(output_file, "rb") as f:
+        _, _, count = COMPILED_HEADER.unpack(f.read(COMPILED_HEADER.size))
+        for _ in range(count):
+            consensus_addr, fee_addr, l2p_fee_addr, voting_power, bls_key = COMPILED_RECORD.unpack(
+                f.read(COMPILED_RECORD.size)
+            )
+            yield {
+                "consensusAddr": "0x" + consensus_addr.hex(),
+                "feeAddr": "0x" + fee_addr.hex(),
+                "l2pFeeAddr": "0x" + l2p_fee_addr.hex(),
+                "votingPower": str(voting_power),
+                "bLSPublicKey": "0x" + bls_key.hex(),
+            }
+
+
+def hex_to_bytes(value):
+    return bytes.fromhex(value[2:] if value.startswith("0x") else value)
+
+
+def int_to_bytes(value):
+    # big-endian without leading zeros, so that 0 is the empty string like in the js rlp package
+    return value.to_bytes((value.bit_length() + 7) // 8, "big")
+
+
+def header_length(length):
+    return 1 if length < 56 else 1 + len(int_to_bytes(length))
+
+
+def string_length(value):
+    if len(value) == 1 and value[0] < 0x80:
+        return 1
+    return header_length(len(value)) + len(value)
+
+
+def write_header(buf, offset, length, short_prefix):
+    """
+    Write the RLP header of a string (0x80) or a list (0xc0) of `length` bytes, returning the next offset.
+    """
+    if length < 56:
+        buf[offset] = short_prefix + length
+        return offset + 1
+
+    length_bytes = int_to_bytes(length)
+    buf[offset] = short_prefix + 55 + len(length_bytes)
+    buf[offset + 1:offset + 1 + len(length_bytes)] = length_bytes
+    return offset + 1 + len(length_bytes)
+
+
+def write_string(buf, offset, value):
+    if len(value) == 1 and value[0] < 0x80:
+        buf[offset] = value[0]
+        return offset + 1
+
+    offset = write_header(buf, offset, len(value), 0x80)
+    buf[offset:offset + len(value)] = value
+    return offset + len(value)
+
+
+def encode_validator_set(validators):
+    """
+    Encode the validator set package `[0x00, [[consensusAddr, l2pFeeAddr, feeAddr, votingPower, blsKey], ...]]` of
+    `INIT_VALIDATORSET_BYTES`, the same way as `validatorUpdateRlpEncode` of validators.template.
+
+    The fields are converted and measured in a first pass, so the whole package is written into a single preallocated
+    buffer no matter how many validators there are.
+    """
+    items = []
+    items_length = 0
+    for v in validators:
+        fields = (
+            hex_to_bytes(v["consensusAddr"]),
+            hex_to_bytes(v["l2pFeeAddr"]),
+            hex_to_bytes(v["feeAddr"]),
+            int_to_bytes(int(v["votingPower"], 0)),
+            hex_to_bytes(v["bLSPublicKey"]),
+        )
+        fields_length = sum(string_length(f) for f in fields)
+        items.append((fields, fields_length))
+        items_length += header_length(fields_length) + fields_length
+
+    # the package type 0x00 is encoded as the empty string
+    pkg_length = 1 + header_length(items_length) + items_length
+    buf = bytearray(header_length(pkg_length) + pkg_length)
+
+    offset = write_header(buf, 0, pkg_length, 0xc0)
+    offset = write_string(buf, offset, b"")
+    offset = write_header(buf, offset, items_length, 0xc0)
+    for fields, fields_length in items:
+        offset = write_header(buf, offset, fields_length, 0xc0)
+        for f in fields:
+            offset = write_string(buf, offset, f)
+
+    return bytes(buf)
+
+
+def extra_data(validators):
+    """
+    The Parlia extraData of the genesis block: a 32 bytes vanity, the consensus addresses of the validators and a 65
+    bytes seal, the same way as `generateExtraData` of validators.template.
+    """
+    addrs = [hex_to_bytes(v["consensusAddr"]) for v in validators]
+    buf = bytearray(EXTRA_VANITY_LENGTH + sum(len(addr) for addr in addrs) + EXTRA_SEAL_LENGTH)
+
+    offset = EXTRA_VANITY_LENGTH
+    for addr in addrs:
+        buf[offset:offset + len(addr)] = addr
+        offset += len(addr)
+
+    return bytes(buf)